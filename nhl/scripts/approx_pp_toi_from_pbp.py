@@ -1,22 +1,31 @@
 #  scripts/approx_pp_toi_from_pbp.py
 
 #!/usr/bin/env python3
-import argparse, os, sys, time, json
+import argparse, os
+from collections import defaultdict
 from typing import Dict, Any, List, Tuple, Optional
-import requests
-import psycopg2, psycopg2.extras
+import numpy as np
+import orjson
+import psycopg2
+
+from nhl_common import make_session, prefetch, apply_pp_toi_updates
+
+try:  # optional: pip install numba — compiled PP-window membership kernel
+    from numba import njit
+except ImportError:
+    njit = None
 
 API_BASE = "https://api-web.nhle.com/v1/gamecenter"
 
+SESSION = make_session()
+
 def gj(url: str) -> Optional[Dict[str, Any]]:
-    for _ in range(3):
-        try:
-            r = requests.get(url, timeout=15)
-            r.raise_for_status()
-            return r.json()
-        except Exception:
-            time.sleep(0.4)
-    return None
+    try:
+        r = SESSION.get(url, timeout=15)
+        r.raise_for_status()
+        return orjson.loads(r.content)
+    except Exception:
+        return None
 
 def strength_tuple(ev: Dict[str, Any]) -> Tuple[int,int]:
     """
@@ -65,6 +74,20 @@ def players_by_role(ev: Dict[str, Any]) -> Dict[str,int]:
         if isinstance(pid, int): out[role]=pid
     return out
 
+def shooter_id(ev: Dict[str, Any]) -> Optional[int]:
+    """players_by_role(ev).get("Shooter") without building the role dict."""
+    sid = None
+    for p in (ev.get("players") or []):
+        if not isinstance(p, dict): continue
+        if (p.get("playerType") or p.get("role") or "Player") != "Shooter": continue
+        pid = p.get("playerId") or p.get("id")
+        if isinstance(pid, int): sid = pid
+    return sid
+
+# "M:SS" / "MM:SS" -> seconds for every in-period clock, built once at import (4.2k entries)
+_CLOCK_SEC = {f"{m}:{s:02d}": m*60 + s for m in range(60) for s in range(60)}
+_CLOCK_SEC.update({f"{m:02d}:{s:02d}": m*60 + s for m in range(10) for s in range(60)})
+
 def clock_seconds(ev: Dict[str, Any]) -> int:
     """
     Convert game clock to absolute seconds since start (approx).
@@ -74,76 +97,113 @@ def clock_seconds(ev: Dict[str, Any]) -> int:
     per = int(ev.get("period", 0) or 0)
     t = ev.get("timeInPeriod")
     sec = 0
-    if isinstance(t, str) and ":" in t:
-        m,s = t.split(":",1)
-        try:
-            # timeInPeriod is elapsed, not remaining (api-web), but some endpoints use remaining.
-            # If this ends up backwards on a few events, it only affects ordering within a small window.
-            sec = int(m)*60 + int(s)
-        except: pass
+    if isinstance(t, str):
+        # one dict probe for well-formed clocks; split + int() only for anything else
+        sec = _CLOCK_SEC.get(t)
+        if sec is None:
+            sec = 0
+            if ":" in t:
+                m,s = t.split(":",1)
+                try:
+                    # timeInPeriod is elapsed, not remaining (api-web), but some endpoints use remaining.
+                    # If this ends up backwards on a few events, it only affects ordering within a small window.
+                    sec = int(m)*60 + int(s)
+                except: pass
     # 20-min periods baseline; OT not special-cased (OK for relative windows)
     return (per-1)*20*60 + sec
 
-def build_pp_intervals(plays: List[Dict[str,Any]], home_abbr: str, away_abbr: str) -> Dict[str,List[Tuple[int,int]]]:
+def build_pp_intervals(plays: List[Dict[str,Any]], home_abbr: str, away_abbr: str,
+                       times: Optional[List[int]] = None) -> Dict[str,List[Tuple[int,int]]]:
     """
     Return { team_abbr: [(start_sec, end_sec), ...] } for offensive PP (they have more skaters).
     We detect any interval where one side has skater advantage (e.g., 5v4, 5v3).
+    `times` is clock_seconds for each play, when the caller has already computed it.
+
+    Vectorized sweep: over the chronological events with both strengths known, each run of
+    the same advantage side opens a PP at its first event and closes it at the next run's
+    first event (or at the last event of the game); even-strength runs emit nothing.
     """
+    if times is None:
+        times = [clock_seconds(ev) for ev in plays]
     pp = {home_abbr: [], away_abbr: []}
-    # Iterate chronologically
-    sp = sorted(plays, key=clock_seconds)
-    cur = {home_abbr: None, away_abbr: None}  # start time if in PP
-    for ev in sp:
-        h,a = strength_tuple(ev)
-        if not h or not a:
-            continue
-        if h > a:
-            # home on PP
-            if cur[home_abbr] is None: cur[home_abbr] = clock_seconds(ev)
-            if cur[away_abbr] is not None:
-                # away no longer PP
-                s = cur[away_abbr]; e = clock_seconds(ev)
-                if e>s: pp[away_abbr].append((s,e))
-                cur[away_abbr]=None
-        elif a > h:
-            # away on PP
-            if cur[away_abbr] is None: cur[away_abbr] = clock_seconds(ev)
-            if cur[home_abbr] is not None:
-                s = cur[home_abbr]; e = clock_seconds(ev)
-                if e>s: pp[home_abbr].append((s,e))
-                cur[home_abbr]=None
-        else:
-            # even strength—close any open PP
-            for ab in (home_abbr, away_abbr):
-                if cur[ab] is not None:
-                    s = cur[ab]; e = clock_seconds(ev)
-                    if e>s: pp[ab].append((s,e))
-                    cur[ab]=None
-    # close any trailing intervals at last event time
-    if sp:
-        last_t = clock_seconds(sp[-1])
-        for ab in (home_abbr, away_abbr):
-            if cur[ab] is not None:
-                s = cur[ab]; e = last_t
-                if e>s: pp[ab].append((s,e))
-                cur[ab]=None
+    if not plays or home_abbr == away_abbr:
+        return pp
+    st = np.array([strength_tuple(ev) for ev in plays], dtype=np.int64)
+    known = (st[:, 0] != 0) & (st[:, 1] != 0)
+    if not known.any():
+        # no strength info anywhere in the game (common in partial feeds): no windows, no sort
+        return pp
+    ts = np.asarray(times, dtype=np.int64)
+    if (ts[1:] >= ts[:-1]).all():
+        # feeds come in clock order; a stable sort of sorted input is the identity
+        hs, as_ = st[:, 0], st[:, 1]
+    else:
+        order = np.argsort(ts, kind="stable")
+        ts, hs, as_, known = ts[order], st[order, 0], st[order, 1], known[order]
+    last_t = ts[-1]
+    ts, side = ts[known], np.sign(hs[known] - as_[known])  # +1 home PP, -1 away PP, 0 even
+    runs = np.flatnonzero(np.r_[True, side[1:] != side[:-1]])
+    starts = ts[runs]
+    ends = np.r_[ts[runs[1:]], last_t]
+    run_side = side[runs]
+    for ab, sgn in ((home_abbr, 1), (away_abbr, -1)):
+        m = (run_side == sgn) & (ends > starts)
+        pp[ab] = list(zip(starts[m].tolist(), ends[m].tolist()))
     return pp
 
-def in_any_interval(t: int, intervals: List[Tuple[int,int]]) -> bool:
-    for s,e in intervals:
-        if s <= t <= e: return True
-    return False
+def interval_bounds(intervals: List[Tuple[int,int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split one team's PP windows into parallel (starts, ends) int arrays for in_pp_windows.
+    build_pp_intervals emits them in time order and never overlapping, so starts are sorted.
+    """
+    a = np.array(intervals, dtype=np.int64).reshape(-1, 2)
+    return np.ascontiguousarray(a[:, 0]), np.ascontiguousarray(a[:, 1])
+
+if njit is not None:
+    @njit(cache=True)
+    def in_pp_windows(ts, starts, ends):
+        """Per event time: inside any [start, end] window?"""
+        out = np.zeros(ts.size, dtype=np.bool_)
+        for k in range(ts.size):
+            # only the last window starting at or before t can contain it
+            i = np.searchsorted(starts, ts[k], side="right") - 1
+            out[k] = i >= 0 and ts[k] <= ends[i]
+        return out
+else:
+    def in_pp_windows(ts, starts, ends):
+        """Per event time: inside any [start, end] window?"""
+        if not starts.size:
+            return np.zeros(ts.size, dtype=bool)
+        i = np.searchsorted(starts, ts, side="right") - 1
+        return (i >= 0) & (ts <= ends[np.maximum(i, 0)])
 
 def is_pp_attempt(ev: Dict[str,Any]) -> bool:
     typ = (ev.get("typeDescKey") or ev.get("eventType") or "").upper()
     return typ in ("SHOT", "GOAL", "MISSED_SHOT", "BLOCKED_SHOT")
 
+def skater_rows_by_game(cur, game_ids: List[int]) -> Dict[int, List[Tuple]]:
+    """
+    {game_id: [(player_id, team_id, opponent_id, is_home), ...]} for skater rows still missing
+    pp_toi_minutes, for a whole chunk of games in one query.
+    """
+    cur.execute("""
+      SELECT game_id, player_id, team_id, opponent_id, is_home
+      FROM nhl.skater_game_logs_raw
+      WHERE game_id = ANY(%s) AND (pp_toi_minutes IS NULL)
+    """, (list(game_ids),))
+    out: Dict[int, List[Tuple]] = defaultdict(list)
+    for gid, *row in cur.fetchall():
+        out[gid].append(tuple(row))
+    return out
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--db-url", help="Postgres DSN/URL (pooler OK). If omitted, reads ./db_url.txt", default=None)
     ap.add_argument("--project", default=".", help="Project root for db_url.txt fallback")
     ap.add_argument("--limit-games", type=int, default=0, help="Optional limit of games to process")
-    ap.add_argument("--commit-every", type=int, default=200, help="Commit frequency")
+    ap.add_argument("--commit-every", type=int, default=1000,
+                    help="Games per chunk: one skater-row SELECT and one staged bulk UPDATE + commit")
+    ap.add_argument("--workers", type=int, default=12, help="Concurrent play-by-play fetches")
     ap.add_argument("--verbose", action="store_true")
     args = ap.parse_args()
 
@@ -155,13 +215,12 @@ def main():
     conn = psycopg2.connect(dsn); conn.autocommit = False
     cur = conn.cursor()
 
-    # 1) games where skater rows have NULL pp_toi_minutes
+    # 1) games where skater rows have NULL pp_toi_minutes (skater_pp_null_idx, see skater_pp_null_index.sql)
     cur.execute("""
       WITH g AS (
-        SELECT game_id
+        SELECT DISTINCT game_id
         FROM nhl.skater_game_logs_raw
         WHERE pp_toi_minutes IS NULL
-        GROUP BY game_id
       )
       SELECT g.game_id,
              MAX(CASE WHEN s.is_home THEN t.abbr ELSE opp.abbr END) AS home_abbr,
@@ -179,10 +238,22 @@ def main():
 
     processed = 0
     updated_rows = 0
+    chunk = max(1, args.commit_every)
+    staged: List[Tuple[float,int,int]] = []  # (pp_minutes, pid, gid) across the current chunk
+    sk_by_game: Dict[int, List[Tuple]] = {}
 
-    for (gid, home_abbr, away_abbr) in games:
+    # HTTP runs ahead on the pool; parsing and DB updates stay on this thread, in game order
+    urls = (f"{API_BASE}/{gid}/play-by-play" for (gid, _, _) in games)
+    for (gid, home_abbr, away_abbr), pbp in zip(games, prefetch(gj, urls, args.workers)):
         processed += 1
-        pbp = gj(f"{API_BASE}/{gid}/play-by-play")
+        if (processed - 1) % chunk == 0:
+            # chunk boundary: apply the previous chunk's updates, load this chunk's skater rows
+            if staged:
+                updated_rows += apply_pp_toi_updates(conn, staged)
+                staged = []
+                if args.verbose:
+                    print(f"… committed @ {processed-1}/{len(games)} (rows updated so far: {updated_rows})", flush=True)
+            sk_by_game = skater_rows_by_game(cur, [g for (g, _, _) in games[processed-1:processed-1+chunk]])
         if not isinstance(pbp, dict):
             if args.verbose: print(f"[{processed}/{len(games)}] {gid}: no PBP → skip", flush=True)
             continue
@@ -191,31 +262,50 @@ def main():
             if args.verbose: print(f"[{processed}/{len(games)}] {gid}: empty PBP → skip", flush=True)
             continue
 
-        pp_windows = build_pp_intervals(plays, home_abbr, away_abbr)
-        # Count PP attempts per player per team
-        team_attempts: Dict[str, Dict[int,int]] = {home_abbr:{}, away_abbr:{}}
+        # game clock per play, parsed once for the window build and both passes below
+        times = [clock_seconds(ev) for ev in plays]
+        pp_windows = build_pp_intervals(plays, home_abbr, away_abbr, times)
+        # Which plays fall inside their own team's PP windows: one kernel call per team
+        abbrs = [event_team_abbr(ev) for ev in plays]
+        ts = np.asarray(times, dtype=np.int64)
+        in_pp = np.zeros(len(plays), dtype=bool)
+        for ab in (home_abbr, away_abbr):
+            if not pp_windows[ab]: continue
+            own = np.fromiter((x == ab for x in abbrs), dtype=bool, count=len(abbrs))
+            in_pp |= own & in_pp_windows(ts, *interval_bounds(pp_windows[ab]))
+        pp_idx = np.flatnonzero(in_pp).tolist()
 
-        for ev in plays:
+        # Count PP attempts per player per team; only attempts need their shooter. Tallies go in
+        # a (team, player) count matrix: row 0 home, 1 away, columns a per-game shooter index.
+        pid_to_idx: Dict[int,int] = {}
+        att_rows: List[int] = []
+        att_cols: List[int] = []
+        for i in pp_idx:
+            ev = plays[i]
             if not is_pp_attempt(ev): continue
-            t = clock_seconds(ev)
-            ab = event_team_abbr(ev)
-            if ab not in (home_abbr, away_abbr): continue
-            if not in_any_interval(t, pp_windows[ab]): continue
-            roles = players_by_role(ev)
-            shooter = roles.get("Shooter")
-            if isinstance(shooter, int):
-                team_attempts[ab][shooter] = team_attempts[ab].get(shooter, 0) + 1
+            shooter = shooter_id(ev)
+            if shooter is not None:
+                att_rows.append(0 if abbrs[i] == home_abbr else 1)
+                att_cols.append(pid_to_idx.setdefault(shooter, len(pid_to_idx)))
+        counts = np.zeros((2, len(pid_to_idx)), dtype=np.int32)
+        np.add.at(counts, (np.asarray(att_rows, dtype=np.intp), np.asarray(att_cols, dtype=np.intp)), 1)
+        att_total = counts.sum(axis=1)
+        shares = counts / np.maximum(att_total, 1)[:, None]  # each shooter's share of the team's attempts
 
         # total PP seconds per team
         pp_sec = {ab: sum(e-s for (s,e) in pp_windows[ab]) for ab in (home_abbr, away_abbr)}
 
-        # fetch all skater rows for gid (need team_id/opponent_id/is_home/player_id)
-        cur.execute("""
-          SELECT player_id, team_id, opponent_id, is_home
-          FROM nhl.skater_game_logs_raw
-          WHERE game_id = %s AND (pp_toi_minutes IS NULL)
-        """, (gid,))
-        sk_rows = cur.fetchall()
+        # Even-split fallback candidates: skaters who had ANY PP event as Player/Shooter etc.
+        # Only read for a team with PP time but no attempts, so the role maps are built just then.
+        pp_participants: Dict[str, set] = {home_abbr:set(), away_abbr:set()}
+        for i in pp_idx:
+            ab = abbrs[i]
+            if pp_sec[ab] <= 0 or att_total[0 if ab == home_abbr else 1]: continue
+            for pid in players_by_role(plays[i]).values():
+                pp_participants[ab].add(pid)
+
+        # skater rows for gid (need team_id/opponent_id/is_home/player_id)
+        sk_rows = sk_by_game.get(gid)
         if not sk_rows:
             if args.verbose: print(f"[{processed}/{len(games)}] {gid}: nothing to update", flush=True)
             continue
@@ -225,17 +315,6 @@ def main():
         # Simple: if is_home = true → team_abbr = home_abbr else away_abbr
         updates: List[Tuple[float,int,int]] = []  # (pp_minutes, pid, gid)
 
-        # Precompute even-split fallback candidates: skaters who had ANY PP event as Player/Shooter etc.
-        pp_participants: Dict[str, set] = {home_abbr:set(), away_abbr:set()}
-        for ev in plays:
-            t = clock_seconds(ev)
-            ab = event_team_abbr(ev)
-            if ab not in (home_abbr, away_abbr): continue
-            if not in_any_interval(t, pp_windows[ab]): continue
-            for pid in players_by_role(ev).values():
-                if isinstance(pid, int):
-                    pp_participants[ab].add(pid)
-
         for (pid, team_id, opp_id, is_home) in sk_rows:
             team_ab = home_abbr if is_home else away_abbr
             team_pp = pp_sec.get(team_ab, 0)
@@ -244,11 +323,10 @@ def main():
                 updates.append((0.0, pid, gid))
                 continue
 
-            attempts = team_attempts[team_ab]
-            total_w = sum(attempts.values())
-            if total_w > 0:
-                w = attempts.get(pid, 0)
-                pp_secs_for_player = (team_pp * (w / total_w))
+            row = 0 if is_home else 1
+            if att_total[row] > 0:
+                idx = pid_to_idx.get(pid)
+                pp_secs_for_player = team_pp * (float(shares[row, idx]) if idx is not None else 0.0)
             else:
                 # even split among participants; if none, skip
                 parts = pp_participants[team_ab]
@@ -263,26 +341,10 @@ def main():
                 continue
             updates.append((round(pp_secs_for_player/60.0, 2), pid, gid))
 
-        if updates:
-            psycopg2.extras.execute_values(
-                cur,
-                """
-                UPDATE nhl.skater_game_logs_raw AS s SET
-                  pp_toi_minutes = data.pp_min
-                FROM (VALUES %s) AS data(pp_min, player_id, game_id)
-                WHERE s.player_id = data.player_id
-                  AND s.game_id   = data.game_id
-                  AND s.pp_toi_minutes IS NULL
-                """,
-                updates, page_size=100
-            )
-            updated_rows += cur.rowcount
-
-        if processed % args.commit_every == 0:
-            conn.commit()
-            if args.verbose:
-                print(f"… committed @ {processed}/{len(games)} (rows updated so far: {updated_rows})", flush=True)
+        staged.extend(updates)
 
+    if staged:
+        updated_rows += apply_pp_toi_updates(conn, staged)
     conn.commit()
     print(f"✅ Done. Games scanned: {processed}, rows updated: {updated_rows}")
 
@@ -1,16 +1,66 @@
 #!/usr/bin/env python3
-import argparse, os, time, json, math, sys
+import argparse, os, time, json, math, sys, threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Tuple
 import psycopg2, psycopg2.extras
-import requests
+import orjson
+
+# nhl_common lives one directory up (scripts/)
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from nhl_common import make_session, RateLimiter
 
 API_WEB_BASE   = "https://api-web.nhle.com/v1"
 STATSAPI_BASE  = "https://statsapi.web.nhl.com/api/v1"
 
+SESSION = make_session()
+
+class KeyChain:
+    """
+    `j.get(k1) or j.get(k2) or ...`, narrowed after a warmup: once `warmup` payloads have
+    been seen, keys that never carried a value are dropped (api-web's player shape is stable
+    within a season), so later lookups skip the misses. When every kept key is empty the
+    full chain runs, so its value (including the last falsy one) is returned.
+    Not strictly the `or`-chain after warmup: a payload that fills a dropped key *and* a
+    later kept key yields the kept key's value, where the chain would take the dropped one.
+    """
+    def __init__(self, *keys: str, warmup: int = 50):
+        self.all_keys = self.keys = keys
+        self._warmup = warmup
+        self._seen = 0
+        self._used = set()
+        self._lock = threading.Lock()
+
+    def _first(self, j: Dict[str, Any], keys) -> Tuple[Any, Any]:
+        v = None
+        for k in keys:
+            v = j.get(k)
+            if v:
+                return v, k
+        return v, None
+
+    def __call__(self, j: Dict[str, Any]) -> Any:
+        v, k = self._first(j, self.keys)
+        if k is None and self.keys is not self.all_keys:
+            v, k = self._first(j, self.all_keys)
+        if self._seen < self._warmup:
+            with self._lock:
+                if k is not None:
+                    self._used.add(k)
+                self._seen += 1
+                if self._seen == self._warmup and self._used:
+                    self.keys = tuple(x for x in self.all_keys if x in self._used)
+        return v
+
+FIRST_NAME = KeyChain("firstName", "firstNameDefault", "firstNameShort")
+LAST_NAME  = KeyChain("lastName", "lastNameDefault")
+SHOOTS     = KeyChain("shootsCatches", "shoots", "catches")
+
 def http_get_json(url: str, timeout: int = 12) -> Any:
-    r = requests.get(url, timeout=timeout)
+    r = SESSION.get(url, timeout=timeout)
     r.raise_for_status()
-    return r.json()
+    return orjson.loads(r.content)
 
 def fetch_people_apiweb(pid: int) -> Dict[str, Any]:
     """
@@ -25,12 +75,12 @@ def fetch_people_apiweb(pid: int) -> Dict[str, Any]:
     if not isinstance(j, dict): 
         return {}
     # Try common locations for fields; structure can vary by season/status
-    first = j.get("firstName") or j.get("firstNameDefault") or j.get("firstNameShort")
-    last  = j.get("lastName")  or j.get("lastNameDefault")
+    first = FIRST_NAME(j)
+    last  = LAST_NAME(j)
     full  = j.get("fullName")  or (" ".join([first or "", last or ""]).strip() or None)
 
     pos   = j.get("positionAbbrev") or j.get("position") or (j.get("positionCode") if isinstance(j.get("positionCode"), str) else None)
-    shoots= j.get("shootsCatches") or j.get("shoots") or j.get("catches")
+    shoots= SHOOTS(j)
 
     # team: sometimes present as teamId or nested currentTeam
     team_id = None
@@ -76,15 +126,19 @@ def fetch_people_statsapi(pid: int) -> Dict[str, Any]:
         "active": bool(p.get("active", True)),
     }
 
-def fetch_people(ids: List[int], source: str = "auto", sleep_sec: float = 0.15) -> Dict[int, Dict[str, Any]]:
+def fetch_people(ids: List[int], source: str = "auto", rate: float = 10.0,
+                 workers: int = 8) -> Dict[int, Dict[str, Any]]:
     """
-    Fetch each player id individually with small pacing.
+    Fetch each player id individually on a thread pool; one shared limiter keeps lookups
+    at `rate` per second across all workers, so no worker sleeps on a fixed schedule.
     source = 'apiweb' | 'statsapi' | 'auto' (apiweb first, fallback to statsapi)
     """
-    out: Dict[int, Dict[str, Any]] = {}
-    for pid in ids:
+    limiter = RateLimiter(1.0 / rate)
+
+    def fetch_one(pid: int) -> Tuple[int, Dict[str, Any]]:
         data: Dict[str, Any] = {}
         for attempt in range(3):
+            limiter.wait()
             try:
                 if source == "apiweb":
                     data = fetch_people_apiweb(pid)
@@ -98,10 +152,10 @@ def fetch_people(ids: List[int], source: str = "auto", sleep_sec: float = 0.15)
                 break
             except Exception:
                 time.sleep(0.4 * (attempt + 1))
-        if data:
-            out[pid] = data
-        time.sleep(sleep_sec)
-    return out
+        return pid, data
+
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return {pid: data for pid, data in ex.map(fetch_one, ids) if data}
 
 def main():
     ap = argparse.ArgumentParser()
@@ -112,6 +166,8 @@ def main():
     ap.add_argument("--source", choices=["auto","apiweb","statsapi"], default="auto",
                     help="Which API to use for player details (default: auto).")
     ap.add_argument("--batch", type=int, default=500, help="Upsert page size.")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent player lookups.")
+    ap.add_argument("--rate", type=float, default=10.0, help="Max player lookups per second, across workers.")
     args = ap.parse_args()
 
     dsn = args.db_url
@@ -152,7 +208,7 @@ def main():
     print(f"Found {len(ids)} players to backfill… (source={args.source})")
 
     # 2) Fetch from API(s)
-    info = fetch_people(ids, source=args.source)
+    info = fetch_people(ids, source=args.source, rate=args.rate, workers=args.workers)
 
     # 3) Upsert into nhl.players
     rows: List[Tuple] = []
@@ -189,14 +245,14 @@ def main():
         active          = COALESCE(EXCLUDED.active, p.active),
         updated_at      = now();
     """
-    # upsert in pages to keep packets small
+    # upsert in --batch pages, one statement (round trip) per page, one commit for the run
     total = 0
     for i in range(0, len(rows), args.batch):
         chunk = rows[i:i+args.batch]
-        psycopg2.extras.execute_values(cur, upsert_sql, chunk, page_size=min(len(chunk), 500))
-        conn.commit()
+        psycopg2.extras.execute_values(cur, upsert_sql, chunk, page_size=len(chunk), fetch=False)
         total += len(chunk)
         print(f"  • upserted {total}/{len(rows)}")
+    conn.commit()
 
     print(f"Upserted {total} players. ✅")
 
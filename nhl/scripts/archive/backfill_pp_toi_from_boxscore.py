@@ -1,53 +1,81 @@
 #  scripts/backfill_pp_toi_from_boxscore
 
 #!/usr/bin/env python3
-import os, sys, time, re
+import os, sys
+from collections import deque
 from typing import Dict, Any
-import psycopg2, psycopg2.extras
-import requests
+import psycopg2
+import orjson
+
+# nhl_common lives one directory up (scripts/)
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from nhl_common import make_session, RateLimiter, prefetch, apply_pp_toi_updates
 
 API = "https://api-web.nhle.com/v1/gamecenter"
-MMSS = re.compile(r"^\d{1,2}:\d{2}$")
+WORKERS = 8            # concurrent boxscore fetches
+MIN_INTERVAL = 0.08    # seconds between request starts, across all workers
+CHUNK_GAMES = 1000     # games per staged bulk UPDATE + commit
+
+SESSION = make_session()
+
+def is_mmss(s: str) -> bool:
+    # "M:SS" / "MM:SS" by position, without a regex match per string
+    return len(s) in (4, 5) and s[-3] == ":" and s[:-3].isdecimal() and s[-2:].isdecimal()
+
+# "M:SS" / "MM:SS" -> minutes for every clock under an hour, built once at import (4.2k entries)
+_MMSS_MIN = {f"{m}:{s:02d}": round(m + s/60.0, 2) for m in range(60) for s in range(60)}
+_MMSS_MIN.update({f"{m:02d}:{s:02d}": round(m + s/60.0, 2) for m in range(10) for s in range(60)})
 
 def mmss_to_minutes(s: str) -> float:
-    if not s or not MMSS.match(s): return None
-    m, sec = s.split(":")
-    return round(int(m) + int(sec)/60.0, 2)
+    mins = _MMSS_MIN.get(s)
+    if mins is not None or not s or not is_mmss(s): return mins
+    # an hour or more ("60:00".."99:59")
+    return round(int(s[:-3]) + int(s[-2:])/60.0, 2)
+
+def pp_toi_from_boxscore(j: Any) -> Dict[int, float]:
+    """
+    {player_id: pp_toi_minutes} from a boxscore payload. api-web keeps every player line under
+    playerByGameStats, so only that subtree is searched when present (team/venue/broadcast
+    metadata is skipped); other shapes are searched whole. Depth-first, first value per player wins.
+    """
+    out: Dict[int, float] = {}
+    root = j.get("playerByGameStats", j) if isinstance(j, dict) else j
+    stack = deque([root])
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, dict):
+            # common places
+            pid = obj.get("playerId") or obj.get("id")
+            # pp time in a few shapes:
+            pp = obj.get("powerPlayTimeOnIce") or obj.get("ppTimeOnIce")
+            if isinstance(pp, str) and isinstance(pid, int):
+                mins = mmss_to_minutes(pp)
+                if mins is not None:
+                    out.setdefault(pid, mins)
+            # nested forms like { "player": { firstName, ... } }
+            children = obj.values()
+        elif isinstance(obj, list):
+            children = obj
+        else:
+            continue
+        # reversed, so pops come back in document order
+        stack.extend(v for v in reversed(list(children)) if isinstance(v, (dict, list)))
+    return out
 
 def fetch_pp_toi_map(game_id: int) -> Dict[int, float]:
     """
     Return {player_id: pp_toi_minutes} for a game, using boxscore.
     """
     url = f"{API}/{game_id}/boxscore"
-    for _ in range(3):
-        try:
-            r = requests.get(url, timeout=15)
-            r.raise_for_status()
-            j = r.json()
-            out: Dict[int, float] = {}
-
-            def walk(obj: Any):
-                if isinstance(obj, dict):
-                    # common places
-                    pid = obj.get("playerId") or obj.get("id")
-                    # pp time in a few shapes:
-                    pp = obj.get("powerPlayTimeOnIce") or obj.get("ppTimeOnIce")
-                    if isinstance(pp, str) and MMSS.match(pp) and isinstance(pid, int):
-                        mins = mmss_to_minutes(pp)
-                        if mins is not None:
-                            out.setdefault(pid, mins)
-                    # nested forms like { "player": { firstName, ... } }
-                    for v in obj.values():
-                        if isinstance(v, (dict, list)): walk(v)
-                elif isinstance(obj, list):
-                    for v in obj:
-                        if isinstance(v, (dict, list)): walk(v)
-
-            walk(j)
-            return out
-        except Exception:
-            time.sleep(0.3)
-    return {}
+    try:
+        r = SESSION.get(url, timeout=15)
+        r.raise_for_status()
+        j = orjson.loads(r.content)
+    except Exception:
+        return {}
+    return pp_toi_from_boxscore(j)
 
 def main():
     dsn = os.environ.get("DB_URL")
@@ -62,6 +90,7 @@ def main():
     conn.autocommit = False
 
     with conn.cursor() as cur:
+        # served by skater_pp_null_idx (see ../skater_pp_null_index.sql)
         cur.execute("""
             SELECT DISTINCT game_id
             FROM nhl.skater_game_logs_raw
@@ -70,36 +99,36 @@ def main():
         """)
         game_ids = [r[0] for r in cur.fetchall()]
 
+    limiter = RateLimiter(MIN_INTERVAL)
+
+    def fetch(gid: int) -> Dict[int, float]:
+        limiter.wait()
+        return fetch_pp_toi_map(gid)
+
     total_rows = 0
-    for i, gid in enumerate(game_ids, 1):
-        pp_map = fetch_pp_toi_map(gid)
+    staged = []  # (mins, pid, gid) across the current chunk of games
+    for i, (gid, pp_map) in enumerate(zip(game_ids, prefetch(fetch, game_ids, WORKERS)), 1):
+        if (i - 1) % CHUNK_GAMES == 0 and staged:
+            apply_pp_toi_updates(conn, staged)
+            staged = []
+
         if not pp_map:
             if i % 25 == 0:
                 print(f"[{i}/{len(game_ids)}] game_id={gid}: no PP data", flush=True)
-            time.sleep(0.05)
             continue
 
         rows = [(mins, pid, gid) for pid, mins in pp_map.items()]
         if not rows:
-            time.sleep(0.05)
             continue
 
-        with conn.cursor() as cur:
-            psycopg2.extras.execute_values(cur, """
-                UPDATE nhl.skater_game_logs_raw AS s
-                SET pp_toi_minutes = data.mins
-                FROM (VALUES %s) AS data(mins, player_id, game_id)
-                WHERE s.player_id = data.player_id
-                  AND s.game_id   = data.game_id
-                  AND s.pp_toi_minutes IS NULL
-            """, rows, template=None, page_size=500)
-        conn.commit()
+        staged.extend(rows)
         total_rows += len(rows)
 
         if i % 25 == 0:
             print(f"[{i}/{len(game_ids)}] game_id={gid}: updated {len(rows)} (total {total_rows})", flush=True)
-        time.sleep(0.08)
 
+    if staged:
+        apply_pp_toi_updates(conn, staged)
     print(f"✅ Done. Updated rows: {total_rows}")
     conn.close()
 
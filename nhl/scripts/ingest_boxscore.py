@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 import argparse, os, re
+from itertools import chain
 from typing import Any, Dict, List, Tuple, Iterable, Optional
 import requests
 import psycopg
@@ -48,6 +49,62 @@ TEAM_ID_BY_ABBR = {
     "VAN":23,"VGK":54,"WPG":52,"WSH":15
 }
 
+# ───────────── upsert statements (hoisted so the text is stable) ─────────────
+# One constant per statement keeps the SQL text identical across rows and calls.
+
+PLAYER_UPSERT_SQL = """
+    INSERT INTO nhl.players (player_id, full_name, current_team_id, position, status)
+    VALUES (%s, %s, %s, %s, 'active')
+    ON CONFLICT (player_id) DO UPDATE
+      SET full_name       = EXCLUDED.full_name,
+          current_team_id = COALESCE(EXCLUDED.current_team_id, nhl.players.current_team_id),
+          position        = EXCLUDED.position,
+          status          = 'active';
+"""
+
+SKATER_LOG_UPSERT_SQL = """
+    INSERT INTO nhl.skater_game_logs_raw
+    (player_id, game_id, team_id, opponent_id, is_home, game_date,
+    shots_on_goal, shot_attempts, toi_minutes, pp_toi_minutes,
+    ev_sog, pp_sog, sh_sog)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (player_id, game_id) DO UPDATE SET
+    team_id        = EXCLUDED.team_id,
+    opponent_id    = EXCLUDED.opponent_id,
+    is_home        = EXCLUDED.is_home,
+    game_date      = EXCLUDED.game_date,
+    shots_on_goal  = EXCLUDED.shots_on_goal,
+    shot_attempts  = EXCLUDED.shot_attempts,
+    toi_minutes    = EXCLUDED.toi_minutes,
+    pp_toi_minutes = EXCLUDED.pp_toi_minutes,
+    ev_sog         = EXCLUDED.ev_sog,
+    pp_sog         = EXCLUDED.pp_sog,
+    sh_sog         = EXCLUDED.sh_sog;
+"""
+
+GOALIE_LOG_UPSERT_SQL = """
+    INSERT INTO nhl.goalie_game_logs_raw
+    (player_id, game_id, team_id, opponent_id, is_home, game_date,
+    toi_minutes, shots_faced, saves, goals_allowed,
+    start_flag, pulled_flag,
+    ev_shots_faced, pp_shots_faced, sh_shots_faced, rebounds_allowed)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+    ON CONFLICT (game_id, player_id) DO UPDATE SET
+    team_id         = EXCLUDED.team_id,
+    opponent_id     = EXCLUDED.opponent_id,
+    is_home         = EXCLUDED.is_home,
+    game_date       = EXCLUDED.game_date,
+    toi_minutes     = EXCLUDED.toi_minutes,
+    shots_faced     = EXCLUDED.shots_faced,
+    saves           = EXCLUDED.saves,
+    goals_allowed   = EXCLUDED.goals_allowed,
+    start_flag      = EXCLUDED.start_flag,
+    pulled_flag     = EXCLUDED.pulled_flag,
+    ev_shots_faced  = COALESCE(EXCLUDED.ev_shots_faced, nhl.goalie_game_logs_raw.ev_shots_faced),
+    pp_shots_faced  = COALESCE(EXCLUDED.pp_shots_faced, nhl.goalie_game_logs_raw.pp_shots_faced),
+    sh_shots_faced  = COALESCE(EXCLUDED.sh_shots_faced, nhl.goalie_game_logs_raw.sh_shots_faced);
+"""
+
 # ───────────── PBP utilities (best-effort; safe if empty) ─────────────
 
 def plays_list(pbp_obj) -> list:
@@ -685,25 +742,21 @@ def ingest_game(game_id: int) -> None:
             print(f"[dbg] attempts has {len(attempts)} shooters")
             print(f"[dbg] sk_splits has {len(sk_splits)} shooters")
 
+            # section -> (team_id, opponent_id, is_home), shared by skaters & goalies
+            section_meta = {
+                "homeTeam": (home_id, away_id, True),
+                "awayTeam": (away_id, home_id, False),
+            }
+
             # ── Skaters (use boxscore SOG; attempts from PBP if available) ──
             did_log = False
             sk_batch: List[tuple] = []
 
-            for pid, raw, sect in list(iter_skaters("homeTeam")) + list(iter_skaters("awayTeam")):
-                team_id = home_id if sect == "homeTeam" else away_id
-                opp_id  = away_id if sect == "homeTeam" else home_id
-                is_home = (sect == "homeTeam")
+            for pid, raw, sect in chain(iter_skaters("homeTeam"), iter_skaters("awayTeam")):
+                team_id, opp_id, is_home = section_meta[sect]
                 nm = name_by_pid.get(pid) or f"Player {pid}"
 
-                cur.execute("""
-                    INSERT INTO nhl.players (player_id, full_name, current_team_id, position, status)
-                    VALUES (%s, %s, %s, %s, 'active')
-                    ON CONFLICT (player_id) DO UPDATE
-                      SET full_name      = EXCLUDED.full_name,
-                          current_team_id = COALESCE(EXCLUDED.current_team_id, nhl.players.current_team_id),
-                          position        = EXCLUDED.position,
-                          status          = 'active';
-                """, (pid, nm, team_id, pos_code(raw, "F")))
+                cur.execute(PLAYER_UPSERT_SQL, (pid, nm, team_id, pos_code(raw, "F")))
 
                 # SOG from boxscore; attempts via PBP if present
                 sog_box = to_int(raw.get("sog") or raw.get("shotsOnGoal") or raw.get("shots"))
@@ -740,25 +793,7 @@ def ingest_game(game_id: int) -> None:
                 ))
 
             if sk_batch:
-                cur.executemany("""
-                    INSERT INTO nhl.skater_game_logs_raw
-                    (player_id, game_id, team_id, opponent_id, is_home, game_date,
-                    shots_on_goal, shot_attempts, toi_minutes, pp_toi_minutes,
-                    ev_sog, pp_sog, sh_sog)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON CONFLICT (player_id, game_id) DO UPDATE SET
-                    team_id        = EXCLUDED.team_id,
-                    opponent_id    = EXCLUDED.opponent_id,
-                    is_home        = EXCLUDED.is_home,
-                    game_date      = EXCLUDED.game_date,
-                    shots_on_goal  = EXCLUDED.shots_on_goal,
-                    shot_attempts  = EXCLUDED.shot_attempts,
-                    toi_minutes    = EXCLUDED.toi_minutes,
-                    pp_toi_minutes = EXCLUDED.pp_toi_minutes,
-                    ev_sog         = EXCLUDED.ev_sog,
-                    pp_sog         = EXCLUDED.pp_sog,
-                    sh_sog         = EXCLUDED.sh_sog;
-                """, sk_batch)
+                cur.executemany(SKATER_LOG_UPSERT_SQL, sk_batch)
 
             # ---- DEBUG & collect goalie rows (place here) ----------------------------
             home_goalie_rows = list(iter_goalies("homeTeam"))
@@ -772,21 +807,11 @@ def ingest_game(game_id: int) -> None:
 
             # ── Goalies (totals from boxscore; add splits if available) ──
             gl_batch: List[tuple] = []
-            for pid, raw, sect in home_goalie_rows + away_goalie_rows:
-                team_id = home_id if sect == "homeTeam" else away_id
-                opp_id  = away_id if sect == "homeTeam" else home_id
-                is_home = (sect == "homeTeam")
+            for pid, raw, sect in chain(home_goalie_rows, away_goalie_rows):
+                team_id, opp_id, is_home = section_meta[sect]
                 nm = name_by_pid.get(pid) or f"Player {pid}"
 
-                cur.execute("""
-                    INSERT INTO nhl.players (player_id, full_name, current_team_id, position, status)
-                    VALUES (%s, %s, %s, %s, 'active')
-                    ON CONFLICT (player_id) DO UPDATE
-                    SET full_name      = EXCLUDED.full_name,
-                        current_team_id = COALESCE(EXCLUDED.current_team_id, nhl.players.current_team_id),
-                        position        = EXCLUDED.position,
-                        status          = 'active';
-                """, (pid, nm, team_id, "G"))
+                cur.execute(PLAYER_UPSERT_SQL, (pid, nm, team_id, "G"))
 
                 toi = parse_mmss_to_minutes(raw.get("toi") or raw.get("timeOnIce"))
                 shots_faced   = to_int(raw.get("shotsAgainst") or raw.get("shotsFaced"))
@@ -812,28 +837,7 @@ def ingest_game(game_id: int) -> None:
                 ))
 
             if gl_batch:
-                cur.executemany("""
-                    INSERT INTO nhl.goalie_game_logs_raw
-                    (player_id, game_id, team_id, opponent_id, is_home, game_date,
-                    toi_minutes, shots_faced, saves, goals_allowed,
-                    start_flag, pulled_flag,
-                    ev_shots_faced, pp_shots_faced, sh_shots_faced, rebounds_allowed)
-                    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
-                    ON CONFLICT (game_id, player_id) DO UPDATE SET
-                    team_id         = EXCLUDED.team_id,
-                    opponent_id     = EXCLUDED.opponent_id,
-                    is_home         = EXCLUDED.is_home,
-                    game_date       = EXCLUDED.game_date,
-                    toi_minutes     = EXCLUDED.toi_minutes,
-                    shots_faced     = EXCLUDED.shots_faced,
-                    saves           = EXCLUDED.saves,
-                    goals_allowed   = EXCLUDED.goals_allowed,
-                    start_flag      = EXCLUDED.start_flag,
-                    pulled_flag     = EXCLUDED.pulled_flag,
-                    ev_shots_faced  = COALESCE(EXCLUDED.ev_shots_faced, nhl.goalie_game_logs_raw.ev_shots_faced),
-                    pp_shots_faced  = COALESCE(EXCLUDED.pp_shots_faced, nhl.goalie_game_logs_raw.pp_shots_faced),
-                    sh_shots_faced  = COALESCE(EXCLUDED.sh_shots_faced, nhl.goalie_game_logs_raw.sh_shots_faced);
-                """, gl_batch)
+                cur.executemany(GOALIE_LOG_UPSERT_SQL, gl_batch)
 
             conn.commit()
             print(f"✅ Ingested game {game_id}: skaters={len(sk_batch)} goalies={len(gl_batch)}")
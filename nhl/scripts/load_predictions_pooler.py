@@ -4,11 +4,18 @@ Pooler-friendly loader: inserts CSV rows into stage tables (no COPY/PREPARE),
 then calls your existing upsert functions.
 
 Fix: map CSV headers with dots (e.g., p_over_2.5) to stage columns with underscores (p_over_2_5).
+
+--use-asyncpg: stream stage rows with asyncpg's binary COPY (copy_records_to_table)
+and run the SOG and Saves loads concurrently on two connections. Needs
+`pip install asyncpg` and a session pooler URI (COPY is not allowed in
+transaction mode); the default psycopg2 path is unchanged.
 """
 
-import argparse, csv, json
+import argparse, asyncio, json
 from pathlib import Path
 
+import pandas as pd
+
 def read_model_index(d: Path):
     idx = json.loads((d / "MODEL_INDEX.json").read_text())
     fh = d / "FEATURE_HASH.txt"
@@ -17,49 +24,34 @@ def read_model_index(d: Path):
     idx.setdefault("feature_hash", idx.get("feature_hash", ""))
     return idx
 
-def to_float(x):
-    if x is None or x == "": return None
-    try: return float(x)
-    except: return None
+def read_stage_frame(csv_path: str, cols):
+    """
+    Parse a predictions CSV straight into typed stage columns.
+    Dotted headers (p_over_2.5) are matched to stage names (p_over_2_5); the
+    type coercion runs in pandas' C parser instead of a per-cell to_float().
+    """
+    stage_name = lambda c: c.replace(".", "_")
+    raw = pd.read_csv(csv_path, usecols=lambda c: stage_name(c) in cols, na_values=[""])
+    df = pd.DataFrame(index=raw.index)
+    for c in cols:
+        # dotted header wins, the underscore one fills its blanks (row.get("p_over_2.5") or row.get("p_over_2_5"))
+        srcs = sorted((s for s in raw.columns if stage_name(s) == c), key=lambda s: s == c)
+        col = pd.Series(float("nan"), index=raw.index)
+        for s in reversed(srcs):
+            col = pd.to_numeric(raw[s], errors="coerce").fillna(col)
+        # ids are nullable so one blank player_id is a NULL, not a failed file
+        df[c] = col.astype("Int64" if c in ("player_id", "game_id") else "float64")
+    # NaN -> None at the DB boundary so empty cells land as NULL
+    df = df.astype(object).where(df.notna(), None)
+    return list(df.itertuples(index=False, name=None))
 
 def load_sog_rows(csv_path: str):
-    # Map dotted headers to underscore stage columns
-    map_keys = {
-        "p_over_0.5": "p_over_0_5", "p_over_0_5": "p_over_0_5",
-        "p_over_1.5": "p_over_1_5", "p_over_1_5": "p_over_1_5",
-        "p_over_2.5": "p_over_2_5", "p_over_2_5": "p_over_2_5",
-        "p_over_3.5": "p_over_3_5", "p_over_3_5": "p_over_3_5",
-    }
-    out = []
-    with open(csv_path, newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rec = {
-                "player_id": row.get("player_id"),
-                "game_id":   row.get("game_id"),
-                "p_over_0_5": to_float(row.get("p_over_0.5") or row.get("p_over_0_5")),
-                "p_over_1_5": to_float(row.get("p_over_1.5") or row.get("p_over_1_5")),
-                "p_over_2_5": to_float(row.get("p_over_2.5") or row.get("p_over_2_5")),
-                "p_over_3_5": to_float(row.get("p_over_3.5") or row.get("p_over_3_5")),
-            }
-            out.append(rec)
     cols = ["player_id","game_id","p_over_0_5","p_over_1_5","p_over_2_5","p_over_3_5"]
-    return out, cols
+    return read_stage_frame(csv_path, cols), cols
 
 def load_saves_rows(csv_path: str):
-    out = []
-    with open(csv_path, newline="") as f:
-        r = csv.DictReader(f)
-        for row in r:
-            rec = {
-                "player_id":  row.get("player_id"),
-                "game_id":    row.get("game_id"),
-                "p_over_24_5": to_float(row.get("p_over_24.5") or row.get("p_over_24_5")),
-                "p_over_28_5": to_float(row.get("p_over_28.5") or row.get("p_over_28_5")),
-            }
-            out.append(rec)
     cols = ["player_id","game_id","p_over_24_5","p_over_28_5"]
-    return out, cols
+    return read_stage_frame(csv_path, cols), cols
 
 def batched(it, n=1000):
     batch = []
@@ -73,8 +65,59 @@ def insert_stage(cur, table, rows, cols):
     cols_sql = ", ".join(cols)
     placeholders = ", ".join(["%s"] * len(cols))
     sql = f"INSERT INTO {table} ({cols_sql}) VALUES ({placeholders})"
-    data = [[r.get(c) for c in cols] for r in rows]
-    cur.executemany(sql, data)
+    cur.executemany(sql, rows)
+
+SOG_LOADER_SQL = """
+    SELECT nhl.load_sog_predictions_from_stage(
+      p_model_family  => $1,
+      p_model_params  => $2::jsonb,
+      p_feature_hash  => $3,
+      p_model_version => $4
+    )
+"""
+
+SAVES_LOADER_SQL = """
+    SELECT nhl.load_saves_predictions_from_stage(
+      p_model_family  => $1,
+      p_model_params  => $2::jsonb,
+      p_feature_hash  => $3,
+      p_model_version => $4
+    )
+"""
+
+async def copy_and_upsert(db_url, label, table, rows, cols, loader_sql, idx, version):
+    import asyncpg
+    # statement_cache_size=0: the pooler can hand us a different backend per session
+    conn = await asyncpg.connect(db_url, statement_cache_size=0)
+    try:
+        async with conn.transaction():
+            print(f"🧹 Truncating nhl.{table} …")
+            await conn.execute(f"TRUNCATE nhl.{table}")
+            print(f"📥 Copying {len(rows)} {label} stage rows …")
+            await conn.copy_records_to_table(
+                table, schema_name="nhl", columns=cols,
+                records=rows,
+            )
+            print(f"🚀 Upserting {label} to nhl.predictions …")
+            res = await conn.fetchrow(
+                loader_sql, idx["family"], json.dumps(idx.get("params", {})),
+                idx["feature_hash"], version,
+            )
+            print("✅", label, tuple(res) if res is not None else None)
+    finally:
+        await conn.close()
+
+async def main_asyncpg(args, sog_idx, saves_idx):
+    jobs = []
+    if args.sog_csv:
+        rows, cols = load_sog_rows(args.sog_csv)
+        jobs.append(copy_and_upsert(args.db_url, "SOG", "predictions_sog_stage", rows, cols,
+                                    SOG_LOADER_SQL, sog_idx, "latest/shots_on_goal"))
+    if args.saves_csv:
+        rows, cols = load_saves_rows(args.saves_csv)
+        jobs.append(copy_and_upsert(args.db_url, "Saves", "predictions_saves_stage", rows, cols,
+                                    SAVES_LOADER_SQL, saves_idx, "latest/goalie_saves"))
+    await asyncio.gather(*jobs)
 
 def main():
     ap = argparse.ArgumentParser()
@@ -84,6 +127,8 @@ def main():
     ap.add_argument("--saves-csv")
     ap.add_argument("--sog-model-dir")
     ap.add_argument("--saves-model-dir")
+    ap.add_argument("--use-asyncpg", action="store_true",
+                    help="COPY stage rows via asyncpg and load SOG/Saves concurrently")
     args = ap.parse_args()
 
     proj = Path(args.project)
@@ -93,6 +138,15 @@ def main():
     sog_idx   = read_model_index(sog_dir)   if args.sog_csv else None
     saves_idx = read_model_index(saves_dir) if args.saves_csv else None
 
+    if args.use_asyncpg:
+        try:
+            import asyncpg  # noqa
+        except ImportError:
+            raise SystemExit("--use-asyncpg needs asyncpg (pip install asyncpg)")
+        asyncio.run(main_asyncpg(args, sog_idx, saves_idx))
+        print("🎉 Done. Upserts complete via asyncpg COPY.")
+        return
+
     import psycopg2
     conn = psycopg2.connect(args.db_url)
     with conn:
@@ -0,0 +1,78 @@
+#  scripts/nhl_common.py
+"""
+Shared HTTP/DB helpers for the NHL batch scripts (approx_pp_toi_from_pbp.py,
+archive/backfill_*.py, tools/get_fixture.py).
+Scripts outside scripts/ put this directory on sys.path before importing it.
+"""
+import io, threading, time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def make_session(pool_connections: int = 1, pool_maxsize: int = 32, backoff_factor: float = 0.3,
+                 user_agent: Optional[str] = "proppadia/1.0") -> requests.Session:
+    """One keep-alive session for every request; urllib3 handles retry/backoff."""
+    s = requests.Session()
+    if user_agent:
+        s.headers.update({"User-Agent": user_agent})
+    s.mount("https://", HTTPAdapter(
+        pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=3, backoff_factor=backoff_factor,
+                          status_forcelist=(429, 500, 502, 503, 504), raise_on_status=False),
+    ))
+    return s
+
+class RateLimiter:
+    """Spaces request starts at least `interval` seconds apart across all worker threads."""
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            at = max(now, self._next)
+            self._next = at + self.interval
+        if at > now:
+            time.sleep(at - now)
+
+def prefetch(fn, items, workers: int):
+    """
+    Yield fn(item) in input order while up to `workers` calls run ahead on a thread pool.
+    At most 2*workers results are buffered, so the consumer (DB work) sets the pace.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        pending = deque()
+        for it in items:
+            pending.append(ex.submit(fn, it))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def apply_pp_toi_updates(conn, rows: List[Tuple[float,int,int]]) -> int:
+    """
+    COPY (pp_minutes, player_id, game_id) rows into a temp staging table and fill
+    nhl.skater_game_logs_raw.pp_toi_minutes (still-NULL rows only) with one UPDATE ... FROM
+    join, then commit. Returns the number of skater rows updated.
+    """
+    buf = io.StringIO("".join(f"{m}\t{pid}\t{gid}\n" for m, pid, gid in rows))
+    with conn.cursor() as cur:
+        cur.execute("CREATE TEMP TABLE _pp_upd (pp_min numeric, player_id bigint, game_id bigint) ON COMMIT DROP")
+        cur.copy_expert("COPY _pp_upd (pp_min, player_id, game_id) FROM STDIN", buf)
+        cur.execute("""
+          UPDATE nhl.skater_game_logs_raw AS s SET
+            pp_toi_minutes = u.pp_min
+          FROM _pp_upd AS u
+          WHERE s.player_id = u.player_id
+            AND s.game_id   = u.game_id
+            AND s.pp_toi_minutes IS NULL
+        """)
+        n = cur.rowcount
+    conn.commit()
+    return n
@@ -0,0 +1,30 @@
+#  scripts/nhl_features.py
+"""
+Feature-encoding helpers shared by the trainers and score_nhl_props.py, so a column
+is turned into numbers the same way at training and at scoring time.
+"""
+import numpy as np
+import pandas as pd
+import pandas.api.types as ptypes
+
+# common boolean spellings -> 0/1 (compared after strip + lower)
+BOOLISH = {"t": 1, "true": 1, "y": 1, "yes": 1, "1": 1,
+           "f": 0, "false": 0, "n": 0, "no": 0, "0": 0}
+
+def is_boolish_strings(series: pd.Series) -> bool:
+    """True if every non-null value is a common boolean spelling (t/f, yes/no, 1/0, ...)."""
+    vals = series.dropna().astype(str).str.strip().str.lower().unique()
+    if len(vals) == 0:
+        return False
+    return set(vals).issubset(BOOLISH)
+
+def boolish_to_float(col: pd.Series) -> np.ndarray:
+    """
+    Binary column -> float64 with NaN for missing/unparseable. Numeric columns pass
+    through; strings map t/f, true/false, yes/no, 1/0 first, then fall back to a
+    numeric parse ("1.0").
+    """
+    if ptypes.is_numeric_dtype(col) or ptypes.is_bool_dtype(col):
+        return pd.to_numeric(col, errors="coerce").to_numpy(dtype=np.float64)
+    s = col.astype(str).str.strip().str.lower()
+    return s.map(BOOLISH).fillna(pd.to_numeric(s, errors="coerce")).to_numpy(dtype=np.float64)
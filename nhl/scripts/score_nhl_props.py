@@ -20,13 +20,32 @@ Usage:
     --out /Users/jerrystrain/Projects/Proppadia/nhl-props/data/processed/sog_predictions.csv
 """
 
-import argparse, json, os, sys, hashlib, math
+import argparse, json, os, sys, hashlib, math, warnings
+from functools import lru_cache
 from typing import List, Dict, Optional
 import numpy as np
 import pandas as pd
-from scipy.stats import poisson as poi_dist, nbinom
+from scipy.special import betainc, gammainc
 import pandas.api.types as ptypes
 
+from nhl_features import boolish_to_float
+
+try:  # optional: pip install numba — parallel survival kernels below
+    from numba import vectorize
+except ImportError:
+    vectorize = None
+
+try:  # optional: pip install pyarrow — CSV/Parquet writers, opt-in multithreaded CSV read
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+# arrow's CSV type-inference/conversion failures; --csv-engine pyarrow falls back to "c" on them
+ARROW_CSV_ERRORS = (pa.ArrowInvalid,) if pa is not None else ()
+# compressed CSV suffixes pyarrow has no writer for here; pandas infers them
+PANDAS_COMPRESSED = (".bz2", ".xz", ".zip", ".zst")
+
 # ------------- utils ------------- #
 
 def sha256_str(s: str) -> str:
@@ -36,13 +55,37 @@ def winsorize_series(s: pd.Series, p_low=0.01, p_high=0.99) -> pd.Series:
     lo, hi = s.quantile(p_low), s.quantile(p_high)
     return s.clip(lo, hi)
 
-def prepare_X(df: pd.DataFrame, raw_feature_list: List[str], model_feature_order: List[str]) -> pd.DataFrame:
+@lru_cache(maxsize=None)
+def dummy_levels(model_feature_order: tuple, col: str, numeric: frozenset = frozenset(),
+                 categorical: frozenset = frozenset()) -> tuple:
+    """
+    Levels of `col` the model one-hot encoded, recovered from its `{col}_{level}` names.
+    `numeric` holds the raw non-categorical features; a name in it is a real column
+    (e.g. a numeric `{col}_avg`), never a level. Names that belong to a longer
+    categorical in `categorical` (`team_opp_BOS` when both `team` and `team_opp`
+    are categorical) are that column's dummies, not `col`'s.
+    """
+    pre = col + "_"
+    longer = tuple(o + "_" for o in categorical if o.startswith(pre))
+    return tuple(dict.fromkeys(f[len(pre):] for f in model_feature_order
+                               if f.startswith(pre) and f not in numeric
+                               and not f.startswith(longer)))
+
+@lru_cache(maxsize=None)
+def feature_positions(model_feature_order: tuple) -> Dict[str, int]:
+    """Column index of each model feature in the design matrix."""
+    return {f: i for i, f in enumerate(model_feature_order)}
+
+def prepare_X(df: pd.DataFrame, raw_feature_list: List[str], model_feature_order: List[str],
+              column_kinds: Optional[Dict[str, str]] = None) -> np.ndarray:
     """
-    Build features to match the model’s saved dummy-encoded order.
+    Build the float32 design matrix in the model’s saved dummy-encoded order.
     - Numeric columns: cast to float, winsorize (except boolean/binary), fill median.
     - Boolean/Binary columns: cast to {0.0,1.0}, no winsorize.
-    - Non-numeric: fill "other" and one-hot encode.
+    - Non-numeric: fill "other" and one-hot encode against the model’s known levels.
     - Reindex to model_feature_order and fill missing columns with 0.0.
+    column_kinds (written by the trainers into MODEL_ARTIFACT.json) fixes each
+    column's branch up front; the data-driven probe is only the fallback.
     """
     def is_bool_or_binary(s: pd.Series) -> bool:
         if ptypes.is_bool_dtype(s):
@@ -57,48 +100,138 @@ def prepare_X(df: pd.DataFrame, raw_feature_list: List[str], model_feature_order
                 return False
         return False
 
-    X = df[raw_feature_list].copy()
-    for c in X.columns:
-        col = X[c]
+    def probe_kind(col: pd.Series) -> str:
         if is_bool_or_binary(col):
-            # binary/boolean -> 0.0/1.0, skip winsorize
-            X[c] = pd.to_numeric(col, errors="coerce").fillna(0).astype(float)
-        elif ptypes.is_numeric_dtype(col):
-            X[c] = pd.to_numeric(col, errors="coerce").astype(float)
-            # winsorize only true continuous numerics
-            lo, hi = X[c].quantile(0.01), X[c].quantile(0.99)
-            X[c] = X[c].clip(lo, hi).fillna(X[c].median())
-        else:
-            # categorical-like
-            X[c] = col.astype(str).fillna("other")
-
-    # One-hot encode any remaining non-numeric columns
-    cat_cols = [c for c in X.columns if not ptypes.is_numeric_dtype(X[c])]
-    if cat_cols:
-        X = pd.get_dummies(X, columns=cat_cols, dummy_na=False)
-
-    # Align to model order and ensure numeric
-    X = X.reindex(columns=model_feature_order, fill_value=0.0)
-    for c in X.columns:
-        X[c] = pd.to_numeric(X[c], errors="coerce").fillna(0.0)
+            return "binary"
+        if ptypes.is_numeric_dtype(col):
+            return "continuous"
+        return "categorical"
 
+    # Classify columns once, then treat each kind as a block
+    kinds = column_kinds or {}
+    blocks: Dict[str, List[str]] = {"binary": [], "continuous": [], "categorical": []}
+    for c in raw_feature_list:
+        kind = kinds.get(c)
+        if kind not in blocks or (kind == "continuous" and not ptypes.is_numeric_dtype(df[c])):
+            kind = probe_kind(df[c])
+        blocks[kind].append(c)
+    bin_cols, cont_cols, cat_cols = blocks["binary"], blocks["continuous"], blocks["categorical"]
+
+    # Scatter each block straight into the model-ordered matrix; features the
+    # model doesn't know are dropped, model features absent here stay 0.0.
+    # float32 is plenty for the linear predictor and halves the GEMV traffic;
+    # row-major keeps X @ coef stride-1.
+    pos = feature_positions(tuple(model_feature_order))
+    X = np.zeros((len(df), len(model_feature_order)), dtype=np.float32)
+
+    def scatter(names: List[str], block: np.ndarray) -> None:
+        idx = np.array([pos.get(c, -1) for c in names], dtype=np.intp)
+        keep = idx >= 0
+        X[:, idx[keep]] = block[:, keep]
+
+    if bin_cols:
+        # binary/boolean -> 0.0/1.0 (t/f, yes/no strings mapped as the trainer does), skip winsorize
+        b = np.column_stack([boolish_to_float(df[c]) for c in bin_cols])
+        b[np.isnan(b)] = 0.0
+        scatter(bin_cols, b)
+    if cont_cols:
+        # winsorize only true continuous numerics: one quantile pass for all columns
+        a = df[cont_cols].to_numpy(dtype=np.float64)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN columns stay NaN
+            lo, med, hi = np.nanquantile(a, [0.01, 0.5, 0.99], axis=0)
+        np.clip(a, lo, hi, out=a)
+        np.copyto(a, np.broadcast_to(med, a.shape), where=np.isnan(a))
+        a[np.isnan(a)] = 0.0  # all-NaN columns
+        scatter(cont_cols, a)
+    numeric = frozenset(bin_cols + cont_cols).union(c for c, k in kinds.items() if k != "categorical")
+    categorical = frozenset(cat_cols).union(c for c, k in kinds.items() if k == "categorical")
+    for c in cat_cols:
+        # categorical-like: one-hot by integer code against the levels the model
+        # was trained on (unseen levels get code -1 and an all-zero row)
+        levels = dummy_levels(tuple(model_feature_order), c, numeric, categorical)
+        if not levels:
+            continue
+        codes = pd.Categorical(df[c].astype(str).fillna("other"), categories=levels).codes
+        onehot = codes[:, None] == np.arange(len(levels))[None, :]
+        scatter([f"{c}_{lv}" for lv in levels], onehot)
     return X
 
-def prob_over_poisson(mu: np.ndarray, line: float) -> np.ndarray:
-    k = int(math.floor(line))
-    return 1.0 - poi_dist.cdf(k, mu)
+if vectorize is not None:
+    # Integer-k survival by summing the pmf recurrence; k is a small line floor,
+    # so the loop is short and each element runs on Numba's thread pool.
+    @vectorize(["float64(float64, float64)"], target="parallel", cache=True)
+    def _pois_sf(mu, k):
+        term = math.exp(-mu)
+        cdf = term
+        for j in range(1, int(k) + 1):
+            term *= mu / j
+            cdf += term
+        return max(1.0 - cdf, 0.0)
 
-def prob_over_nb(mu: np.ndarray, alpha: float, line: float) -> np.ndarray:
+    @vectorize(["float64(float64, float64, float64)"], target="parallel", cache=True)
+    def _nb_sf(mu, r, k):
+        q = mu / (r + mu)
+        term = math.exp(r * math.log1p(-q))  # p**r
+        cdf = term
+        for j in range(1, int(k) + 1):
+            term *= (r + j - 1.0) / j * q
+            cdf += term
+        return max(1.0 - cdf, 0.0)
+
+def mean_from_eta(eta: np.ndarray) -> np.ndarray:
+    """
+    mu = exp(eta) as float64 in a single buffer. eta is clipped to [-30, 30]
+    first so mu is always finite and the survival functions never see inf.
+    """
+    eta = eta.astype(np.float64)
+    np.clip(eta, -30.0, 30.0, out=eta)
+    return np.exp(eta, out=eta)
+
+def prob_over_poisson(mu: np.ndarray, line) -> np.ndarray:
+    # P(X > k) = P(X >= k+1) = regularized lower gamma P(k+1, mu)
+    # `line` may be a scalar or an array that broadcasts against mu.
+    k = np.floor(line)
+    if vectorize is not None:
+        return _pois_sf(mu, k)
+    return gammainc(k + 1, mu)
+
+def prob_over_nb(mu: np.ndarray, alpha: float, line) -> np.ndarray:
+    # NB(r, p) survival: P(X > k) = I_{1-p}(k+1, r), with 1-p = mu / (r + mu)
     a = max(alpha, 1e-8)
     r = 1.0 / a
-    p = r / (r + mu)
-    k = int(math.floor(line))
-    return 1.0 - nbinom.cdf(k, r, p)
+    k = np.floor(line)
+    if vectorize is not None:
+        return _nb_sf(mu, r, k)
+    q = mu / (r + mu)
+    return betainc(k + 1, r, q)
 
 def interp_apply(p_raw: np.ndarray, grid_x: np.ndarray, grid_y: np.ndarray) -> np.ndarray:
     p_raw = np.clip(p_raw, 0.0, 1.0)
     return np.interp(p_raw, grid_x, grid_y, left=grid_y[0], right=grid_y[-1])
 
+def make_calibrator(grid_x: np.ndarray, grid_y: np.ndarray):
+    """
+    Precompute a piecewise-linear lookup for one calibration grid.
+    Grid-style calibrators carry evenly spaced grid_x (linspace(0, 1, 101)), so the
+    segment index is just floor((p - x0) / step): an O(1) gather per element instead
+    of np.interp's binary search. Same values as interp_apply; irregular knots (e.g.
+    isotonic x_thresholds) fall back to it.
+    """
+    n = grid_x.size
+    step = (grid_x[-1] - grid_x[0]) / (n - 1) if n >= 2 else 0.0
+    if step <= 0 or not np.allclose(np.diff(grid_x), step, rtol=1e-9, atol=1e-12):
+        return lambda p: interp_apply(p, grid_x, grid_y)
+    x0 = grid_x[0]
+    lo, hi = max(0.0, x0), min(1.0, grid_x[-1])
+    slope = np.diff(grid_y) / np.diff(grid_x)
+    def apply(p: np.ndarray) -> np.ndarray:
+        p = np.clip(p, lo, hi)
+        idx = ((p - x0) / step).astype(np.intp)
+        np.clip(idx, 0, n - 2, out=idx)
+        return grid_y[idx] + (p - grid_x[idx]) * slope[idx]
+    return apply
+
 def is_num(x) -> bool:
     if x is None: return False
     if isinstance(x, (int,)): return True
@@ -109,6 +242,26 @@ def is_num(x) -> bool:
     except Exception:
         return False
 
+def write_results(results: pd.DataFrame, path: str) -> None:
+    """
+    Parquet (zstd) for *.parquet, CSV otherwise; *.csv.gz is gzipped. Uses pyarrow's
+    C writers when available; pandas' CSV writer is the fallback and also handles
+    the other compressed suffixes (.bz2, .xz, .zip, .zst) by extension.
+    """
+    if pa is None or path.endswith(PANDAS_COMPRESSED):
+        if path.endswith(".parquet"):
+            sys.exit("Parquet output requires pyarrow (pip install pyarrow)")
+        results.to_csv(path, index=False)
+        return
+    tbl = pa.Table.from_pandas(results, preserve_index=False)
+    if path.endswith(".parquet"):
+        pq.write_table(tbl, path, compression="zstd")
+    elif path.endswith(".gz"):
+        with pa.CompressedOutputStream(path, "gzip") as out:
+            pa_csv.write_csv(tbl, out)
+    else:
+        pa_csv.write_csv(tbl, path)
+
 # ------------- main scoring ------------- #
 
 def main():
@@ -119,7 +272,10 @@ def main():
     ap.add_argument("--feature-key", required=True)
     ap.add_argument("--line", required=True, help="comma-separated lines, e.g., 2.5,3.5")
     ap.add_argument("--date-col", default="game_date")
-    ap.add_argument("--out", required=True)
+    ap.add_argument("--out", required=True, help="output path; *.parquet writes Parquet, anything else CSV (gzipped for *.gz)")
+    ap.add_argument("--csv-engine", choices=["c", "pyarrow"], default="c",
+                    help="CSV parser for --csv; pyarrow is multithreaded but infers types from the "
+                         "first block, so it falls back to c when a later row doesn't convert")
     ap.add_argument("--no-monotonic", action="store_true", help="disable monotonic enforcement across lines")
     args = ap.parse_args()
 
@@ -137,6 +293,10 @@ def main():
     params = model_index.get("params", {})
     lines = [float(x) for x in args.line.split(",") if x.strip()]
     lines = sorted(lines)
+    # lines sharing floor(L) share a survival row: evaluate each k once
+    ks = sorted({int(math.floor(L)) for L in lines})
+    k_row = {k: i for i, k in enumerate(ks)}
+    k_col = np.asarray(ks, dtype=float)[:, None]
 
     # Load feature registry
     with open(args.feature_json, "r") as f:
@@ -145,39 +305,55 @@ def main():
         sys.exit(f"feature_key '{args.feature_key}' not found in {args.feature_json}")
     raw_feature_list = feat_meta[args.feature_key]
 
-    # Load data
-    df = pd.read_csv(args.csv)
+    # Load data. When the output only carries the ids, parse just the columns
+    # scoring touches; otherwise keep everything (it is echoed to --out).
+    header = pd.read_csv(args.csv, nrows=0).columns
+    usecols = None
+    if all(c in header for c in ["player_id", "game_id"]):
+        wanted = ["player_id", "game_id", args.date_col, *raw_feature_list]
+        usecols = [c for c in dict.fromkeys(wanted) if c in header]
+    engine = args.csv_engine if pa is not None else "c"
+    try:
+        df = pd.read_csv(args.csv, usecols=usecols, engine=engine)
+    except ARROW_CSV_ERRORS:
+        df = pd.read_csv(args.csv, usecols=usecols, engine="c")
+    obj = df.select_dtypes("object").columns
+    # pyarrow leaves missing strings as None; the levels are keyed on "nan"
+    df[obj] = df[obj].where(df[obj].notna(), np.nan)
     if args.date_col not in df.columns:
         sys.exit(f"Missing date column: {args.date_col}")
 
     # Recreate feature matrix in model's order
+    column_kinds = artifact.get("column_kinds") or {}
     if family == "poisson":
         art = artifact["sklearn_poisson"]
         model_feature_order = art["feature_order"]
-        X = prepare_X(df, raw_feature_list, model_feature_order)
-        coef = np.asarray(art["coef"], dtype=float)
-        intercept = float(art["intercept"])
-        eta = X.values @ coef + intercept
-        mu = np.exp(eta)
-        def raw_probs_for_line(L: float) -> np.ndarray:
-            return np.clip(prob_over_poisson(mu, L), 1e-6, 1-1e-6)
+        X = prepare_X(df, raw_feature_list, model_feature_order, column_kinds)
+        coef = np.asarray(art["coef"], dtype=np.float32)
+        intercept = np.float32(art["intercept"])
+        eta = X @ coef
+        eta += intercept
+        mu = mean_from_eta(eta)
+        sf_tbl = prob_over_poisson(mu[None, :], k_col)
     elif family == "neg_binomial":
         art = artifact["statsmodels_nb"]
         order_with_const = art["feature_order_with_const"]
         model_feature_order = [c for c in order_with_const if c != "const"]
-        X = prepare_X(df, raw_feature_list, model_feature_order)
-        Xc = X.copy()
-        Xc.insert(0, "const", 1.0)
-        Xc = Xc.reindex(columns=order_with_const, fill_value=0.0)
-        params_vec = np.asarray(art["params"], dtype=float)
-        eta = Xc.values @ params_vec
-        mu = np.exp(eta)
+        X = prepare_X(df, raw_feature_list, model_feature_order, column_kinds)
+        # split the const term off instead of materializing a ones column
+        params_vec = np.asarray(art["params"], dtype=np.float32)
+        is_const = np.array([c == "const" for c in order_with_const])
+        eta = X @ params_vec[~is_const]
+        eta += params_vec[is_const].sum()
+        mu = mean_from_eta(eta)
         alpha = float(params.get("disp_alpha", 1.0))
-        def raw_probs_for_line(L: float) -> np.ndarray:
-            return np.clip(prob_over_nb(mu, alpha, L), 1e-6, 1-1e-6)
+        sf_tbl = prob_over_nb(mu[None, :], alpha, k_col)
     else:
         sys.exit(f"Unsupported family in model index: {family}")
 
+    def raw_probs_for_line(L: float, out: np.ndarray) -> np.ndarray:
+        return np.clip(sf_tbl[k_row[int(math.floor(L))]], 1e-6, 1-1e-6, out=out)
+
     # Decide per-line whether to use calibration, based on holdout metrics
     cal_cfg: Dict[str, Dict] = artifact.get("calibration", {}) or {}
     mh_raw: Dict[str, Dict] = model_index.get("metrics_holdout", {}) or {}
@@ -201,47 +377,44 @@ def main():
             return float(cal_b) <= float(raw_b)
         return False
 
+    # Decide once per line; reused by the scoring loop and the summary print
+    apply_cal = {f"{L:g}": should_apply_calibration(f"{L:g}") for L in lines}
+
     # Compute probs per line (raw, then optionally calibrated if beneficial)
     results = df[["player_id","game_id"]].copy() if all(c in df.columns for c in ["player_id","game_id"]) else df.copy()
-    per_line_probs: Dict[float, np.ndarray] = {}
+    # one (n_rows x n_lines) block, filled column by column in place
+    probs = np.empty((len(df), len(lines)), dtype=np.float64)
 
-    for L in lines:
-        raw = raw_probs_for_line(L)
+    for j, L in enumerate(lines):
+        col = probs[:, j]
+        raw_probs_for_line(L, out=col)
         key = f"{L:g}"  # "2.5" formatting
-        if should_apply_calibration(key):
+        if apply_cal[key]:
             ccfg = cal_cfg[key]
-            gx = np.asarray(ccfg.get("grid_x", []), dtype=float)
-            gy = np.asarray(ccfg.get("grid_y", []), dtype=float)
+            # isotonic step knots (x/y_thresholds) or the older 101-point grid
+            gx = np.asarray(ccfg.get("x_thresholds", ccfg.get("grid_x", [])), dtype=float)
+            gy = np.asarray(ccfg.get("y_thresholds", ccfg.get("grid_y", [])), dtype=float)
             if gx.size == 0 or gy.size == 0 or gx.size != gy.size:
-                # malformed calibrator; fall back to raw
-                per_line_probs[L] = raw
-            else:
-                per_line_probs[L] = np.clip(interp_apply(raw, gx, gy), 1e-6, 1-1e-6)
-        else:
-            per_line_probs[L] = raw
+                # malformed calibrator; keep raw
+                continue
+            col[:] = make_calibrator(gx, gy)(col)
+            np.clip(col, 1e-6, 1-1e-6, out=col)
 
     # Optional monotonic enforcement across lines (default ON)
     if not args.no_monotonic and len(lines) >= 2:
-        # ensure p_over is non-increasing as the line increases
-        # build a (n_rows x n_lines) matrix and enforce row-wise monotone
-        mat = np.column_stack([per_line_probs[L] for L in lines])
-        # For each row, enforce cumulative min along columns
-        # i.e., mat[:, i] = min(mat[:, i], mat[:, i-1])
-        for i in range(1, mat.shape[1]):
-            mat[:, i] = np.minimum(mat[:, i], mat[:, i-1])
-        # write back
-        for j, L in enumerate(lines):
-            per_line_probs[L] = mat[:, j]
+        # ensure p_over is non-increasing as the line increases:
+        # row-wise running minimum along the (sorted) lines
+        np.minimum.accumulate(probs, axis=1, out=probs)
 
     # Assemble output
-    for L in lines:
-        results[f"p_over_{L}"] = per_line_probs[L]
+    for j, L in enumerate(lines):
+        results[f"p_over_{L}"] = probs[:, j]
 
     os.makedirs(os.path.dirname(args.out), exist_ok=True)
-    results.to_csv(args.out, index=False)
+    write_results(results, args.out)
     print(f"✅ Wrote predictions to: {args.out}")
     # Print which lines used calibration
-    used = [f"{L:g}" for L in lines if should_apply_calibration(f"{L:g}")]
+    used = [key for key, use in apply_cal.items() if use]
     if used:
         print(f"ℹ️ Applied calibration for lines: {', '.join(used)}")
     else:
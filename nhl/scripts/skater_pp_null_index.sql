@@ -0,0 +1,23 @@
+-- scripts/skater_pp_null_index.sql
+-- One-off: partial index over skater rows still missing pp_toi_minutes, so the
+-- "games that need work" query in approx_pp_toi_from_pbp.py and
+-- archive/backfill_pp_toi_from_boxscore.py is an index scan, not a full scan.
+--
+-- Run once, outside a transaction, on a direct (non-pooler) connection:
+--   psql "$DIRECT_DB_URL" -v ON_ERROR_STOP=1 -f nhl/scripts/skater_pp_null_index.sql
+--
+-- CONCURRENTLY waits for every open transaction on the table. A build that fails
+-- or is cancelled leaves an INVALID index that IF NOT EXISTS would accept, so the
+-- query at the bottom must report indisvalid = true; otherwise
+--   DROP INDEX CONCURRENTLY nhl.skater_pp_null_idx;
+-- and run this file again.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS skater_pp_null_idx
+  ON nhl.skater_game_logs_raw (game_id)
+  WHERE pp_toi_minutes IS NULL;
+
+SELECT c.relname, i.indisvalid
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = 'nhl' AND c.relname = 'skater_pp_null_idx';
@@ -0,0 +1,56 @@
+import gzip
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import score_nhl_props as snp  # noqa: E402
+
+
+@pytest.fixture
+def results():
+    return pd.DataFrame({
+        "player_id": [8478402, 8477934],
+        "game_id": [2025020001, 2025020001],
+        "p_over_2.5": [0.61, 0.38],
+    })
+
+
+@pytest.mark.parametrize("use_pyarrow", [True, False])
+def test_write_results_gzips_csv_gz(tmp_path, results, monkeypatch, use_pyarrow):
+    if use_pyarrow and snp.pa is None:
+        pytest.skip("pyarrow not installed")
+    if not use_pyarrow:
+        monkeypatch.setattr(snp, "pa", None)
+    out = tmp_path / "preds.csv.gz"
+    snp.write_results(results, str(out))
+
+    with gzip.open(out, "rt") as f:
+        back = pd.read_csv(f)
+    pd.testing.assert_frame_equal(back, results)
+
+
+@pytest.mark.parametrize("column_kinds", [{"is_home": "binary", "b2b_flag": "binary"}, None])
+def test_prepare_x_maps_tf_binary_columns(column_kinds):
+    df = pd.DataFrame({
+        "is_home": ["t", "f", "t", None],
+        "b2b_flag": ["f", "f", "t", "f"],
+        "toi_avg": [15.0, 18.5, 12.0, 20.0],
+    })
+    X = snp.prepare_X(df, ["is_home", "b2b_flag", "toi_avg"],
+                      ["toi_avg", "is_home", "b2b_flag"], column_kinds)
+    assert X[:, 1].tolist() == [1.0, 0.0, 1.0, 0.0]
+    assert X[:, 2].tolist() == [0.0, 0.0, 1.0, 0.0]
+
+
+def test_prepare_x_keeps_prefix_named_categoricals_apart():
+    df = pd.DataFrame({
+        "team": ["BOS", "TOR", "MTL"],
+        "team_opp": ["TOR", "BOS", "BOS"],
+    })
+    order = ["team_BOS", "team_TOR", "team_opp_BOS", "team_opp_TOR"]
+    X = snp.prepare_X(df, ["team_opp", "team"], order,
+                      {"team": "categorical", "team_opp": "categorical"})
+    assert X.tolist() == [[1, 0, 0, 1], [0, 1, 1, 0], [0, 0, 1, 0]]
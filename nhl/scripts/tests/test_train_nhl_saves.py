@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import train_nhl_saves as tns  # noqa: E402
+
+
+def test_read_training_csv_handles_late_typed_sparse_column(tmp_path):
+    # b is empty for the whole first arrow block, then a string and a float
+    rows = ["player_id,b,game_date"]
+    rows += [f"{i},,2023-01-{1 + i % 28:02d}" for i in range(300_000)]
+    rows += ["1,x,2024-02-01", "2,1.5,2024-03-05"]
+    path = tmp_path / "saves.csv"
+    path.write_text("\n".join(rows) + "\n")
+
+    df = tns.read_training_csv(str(path), ["player_id", "b", "game_date"], "game_date",
+                               pd.Timedelta(days=40))
+    assert df["player_id"].tolist() == [1, 2]
+    assert df["b"].astype(str).tolist() == ["x", "1.5"]
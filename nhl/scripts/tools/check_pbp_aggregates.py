@@ -3,10 +3,23 @@
 from __future__ import annotations
 import json, sys
 from pathlib import Path
-from collections import defaultdict
+import numpy as np
+import orjson
+
+try:  # optional: pip install numba — compiled bucket counting
+    from numba import njit
+except ImportError:
+    njit = None
 
 FIXTURE_DIR = Path("nhl/fixtures")
 
+# event type -> index into the per-shooter [sog, missed, blocked] counts
+EVENT_TO_BUCKET = {
+    "SHOT": 0, "SHOT-ON-GOAL": 0,
+    "MISSED_SHOT": 1, "MISSED-SHOT": 1, "MISS": 1,
+    "BLOCKED_SHOT": 2, "BLOCKED-SHOT": 2, "BLOCK": 2,
+}
+
 def parse_mmss_to_minutes(mmss: str | None) -> float | None:
     if not mmss or ":" not in str(mmss): return None
     try:
@@ -16,8 +29,8 @@ def parse_mmss_to_minutes(mmss: str | None) -> float | None:
         return None
 
 def load_fixture(game_id: int) -> tuple[dict, dict]:
-    box = json.loads((FIXTURE_DIR / f"{game_id}_box.json").read_text())
-    pbp = json.loads((FIXTURE_DIR / f"{game_id}_pbp.json").read_text())
+    box = orjson.loads((FIXTURE_DIR / f"{game_id}_box.json").read_bytes())
+    pbp = orjson.loads((FIXTURE_DIR / f"{game_id}_pbp.json").read_bytes())
     return box, pbp
 
 def name_map_from_box(box: dict) -> dict[int, str]:
@@ -64,44 +77,74 @@ def _extract_plays_root(pbp) -> list:
     return []
 
 
-def aggregate_attempts_from_pbp(pbp) -> dict[int, dict[str, int]]:
-    out: dict[int, dict[str,int]] = defaultdict(lambda: {"sog":0, "missed":0, "blocked":0})
-    plays = _extract_plays_root(pbp)
-    for p in plays:
-        # event type (several possible keys)
-        typ = str(
-            p.get("typeCode")
-            or p.get("typeDescKey")
-            or (p.get("result") or {}).get("eventTypeId")
-            or ""
-        ).upper()
-
-        # shooter id (several possible locations)
-        shooter = (p.get("details") or {}).get("playerId")
-        if shooter is None:
-            for pl in (p.get("players") or []):
-                role = (pl.get("playerType") or "").lower()
-                if role in ("shooter", "scorer"):
-                    shooter = (pl.get("player") or {}).get("id") or pl.get("playerId")
-                    break
+def _shooter_id(p: dict):
+    """Shooter id from a play (several possible locations); None if absent."""
+    details = p.get("details")
+    shooter = details.get("playerId") if details else None
+    if shooter is None:
+        for pl in (p.get("players") or ()):
+            role = pl.get("playerType")
+            if role and role.lower() in ("shooter", "scorer"):
+                player = pl.get("player")
+                return (player.get("id") if player else None) or pl.get("playerId")
+    return shooter
+
+
+def flatten_pbp(pbp) -> tuple[np.ndarray, np.ndarray]:
+    """
+    One pass over the plays, keeping only shot attempts with a shooter:
+    returns (bucket index int8 into [sog, missed, blocked], shooter id int64).
+    """
+    buckets: list[int] = []
+    shooters: list[int] = []
+    bucket_of = EVENT_TO_BUCKET.get
+    shooter_of = _shooter_id
+    for p in _extract_plays_root(pbp):
+        # event type (several possible keys), first non-empty wins
+        get = p.get
+        typ = get("typeCode") or get("typeDescKey")
+        if not typ:
+            result = get("result")
+            typ = result.get("eventTypeId") if result else None
+            if not typ:
+                continue
+        bucket = bucket_of(typ.upper() if type(typ) is str else str(typ))
+        if bucket is None:
+            continue
+
         try:
-            shooter = int(shooter)
+            shooter = int(shooter_of(p))
         except Exception:
             continue
+        buckets.append(bucket)
+        shooters.append(shooter)
+    return np.array(buckets, dtype=np.int8), np.array(shooters, dtype=np.int64)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _count_buckets(buckets, dense, n_players):
+        out = np.zeros((n_players, 3), np.int64)
+        for i in range(buckets.size):
+            out[dense[i], buckets[i]] += 1
+        return out
+else:
+    def _count_buckets(buckets, dense, n_players):
+        flat = np.bincount(dense * 3 + buckets, minlength=n_players * 3)
+        return flat.reshape(n_players, 3)
 
-        if typ in ("SHOT", "SHOT-ON-GOAL"):
-            out[shooter]["sog"] += 1
-        elif typ in ("MISSED_SHOT", "MISSED-SHOT", "MISS"):
-            out[shooter]["missed"] += 1
-        elif typ in ("BLOCKED_SHOT", "BLOCKED-SHOT", "BLOCK"):
-            out[shooter]["blocked"] += 1
 
-    return out
+def aggregate_attempts_from_pbp(pbp) -> tuple[np.ndarray, np.ndarray]:
+    """Shooter ids and their (n_shooters x 3) [sog, missed, blocked] counts."""
+    buckets, shooters = flatten_pbp(pbp)
+    # map player ids onto a dense 0..n-1 range
+    pids, dense = np.unique(shooters, return_inverse=True)
+    return pids, _count_buckets(buckets, dense, pids.size)
 def main(game_id: int) -> None:
     box, pbp = load_fixture(game_id)
     names = name_map_from_box(box)
     home_ids, away_ids, H, A = team_sets_from_box(box)
-    agg = aggregate_attempts_from_pbp(pbp)
+    pids, counts = aggregate_attempts_from_pbp(pbp)
 
     # quick parser checks
     samples = ["15:24", "00:59", "20:00", None, ""]
@@ -109,10 +152,10 @@ def main(game_id: int) -> None:
 
     # summarize attempts
     rows = []
-    for pid, d in agg.items():
-        total = d["sog"] + d["missed"] + d["blocked"]
+    totals = counts.sum(axis=1)
+    for pid, total, (sog, miss, blk) in zip(pids.tolist(), totals.tolist(), counts.tolist()):
         team = H if pid in home_ids else (A if pid in away_ids else "UNK")
-        rows.append((total, d["sog"], d["missed"], d["blocked"], team, pid, names.get(pid, f"Player {pid}")))
+        rows.append((total, sog, miss, blk, team, pid, names.get(pid, f"Player {pid}")))
     rows.sort(reverse=True)  # highest attempts first
 
     print(json.dumps({
@@ -1,72 +1,73 @@
 # File: nhl/scripts/tools/get_fixture.py
 #!/usr/bin/env python3
 from __future__ import annotations
-import argparse, json, sys, time
+import argparse, json, os, sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Tuple
-import requests
+import orjson
+
+# nhl_common lives one directory up (scripts/)
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+from nhl_common import make_session
 
 BOX_URL_TPL = "https://api-web.nhle.com/v1/gamecenter/{gid}/boxscore"
 PBP_URL_TPL = "https://api-web.nhle.com/v1/gamecenter/{gid}/play-by-play"
 
-def fetch(url: str, retries: int = 3, timeout: int = 12) -> dict:
-    last = None
-    for attempt in range(1, retries + 1):
-        try:
-            r = requests.get(url, timeout=timeout)
-            r.raise_for_status()
-            return r.json()
-        except Exception as e:
-            last = e
-            if attempt < retries:
-                time.sleep(1.2 * attempt)
-            else:
-                raise last
+SESSION = make_session(pool_connections=32, backoff_factor=1.2, user_agent=None)
+
+def fetch(url: str, timeout: int = 12) -> dict:
+    r = SESSION.get(url, timeout=timeout)
+    r.raise_for_status()
+    return r.json()
 
 def save_json(path: Path, data: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    path.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS))
 
 def maybe_load(path: Path) -> Tuple[bool, dict | None]:
     if path.exists():
         try:
-            return True, json.loads(path.read_text(encoding="utf-8"))
+            return True, orjson.loads(path.read_bytes())
         except Exception:
             return True, None  # file exists but unreadable -> treat as stale
     return False, None
 
-def main() -> None:
-    ap = argparse.ArgumentParser(description="Download & cache NHL boxscore + PBP as local fixtures")
-    ap.add_argument("--game-id", type=int, required=True, help="NHL gamePk, e.g., 2025010041")
-    ap.add_argument("--out-dir", default="nhl/fixtures", help="Directory to save fixtures")
-    ap.add_argument("--force", action="store_true", help="Re-download even if files exist")
-    args = ap.parse_args()
-
-    gid = args.game_id
-    out = Path(args.out_dir)
+def fetch_one(gid: int, out: Path, force: bool = False) -> dict:
+    """Load or fetch box + PBP for one game; returns the sanity summary."""
     box_path = out / f"{gid}_box.json"
     pbp_path = out / f"{gid}_pbp.json"
 
-    # Load or fetch boxscore
-    loaded_box, box = maybe_load(box_path)
-    if not loaded_box or args.force or box is None:
-        box = fetch(BOX_URL_TPL.format(gid=gid))
-        save_json(box_path, box)
+    def get_box() -> dict:
+        loaded, box = maybe_load(box_path)
+        if not loaded or force or box is None:
+            box = fetch(BOX_URL_TPL.format(gid=gid))
+            save_json(box_path, box)
+        return box
 
-    # Load or fetch PBP (optional; some preseason games may be sparse)
-    loaded_pbp, pbp = maybe_load(pbp_path)
-    if not loaded_pbp or args.force or pbp is None:
-        try:
-            pbp = fetch(PBP_URL_TPL.format(gid=gid))
-        except Exception:
-            pbp = {"_note": "PBP fetch failed or unavailable for this game"}
-        save_json(pbp_path, pbp)
+    # PBP is optional; some preseason games may be sparse
+    def get_pbp():
+        loaded, pbp = maybe_load(pbp_path)
+        if not loaded or force or pbp is None:
+            try:
+                pbp = fetch(PBP_URL_TPL.format(gid=gid))
+            except Exception:
+                pbp = {"_note": "PBP fetch failed or unavailable for this game"}
+            save_json(pbp_path, pbp)
+        return pbp
+
+    # box + PBP in parallel
+    with ThreadPoolExecutor(max_workers=2) as ex:
+        box_f, pbp_f = ex.submit(get_box), ex.submit(get_pbp)
+        box, pbp = box_f.result(), pbp_f.result()
 
-    # Tiny sanity print
+    # Tiny sanity summary
     home = (box.get("homeTeam") or {}).get("abbrev") or "UNK"
     away = (box.get("awayTeam") or {}).get("abbrev") or "UNK"
     date = (box.get("gameDate") or box.get("startTimeUTC") or "").split("T")[0]
-    print(json.dumps({
+    return {
         "saved": {
             "boxscore": str(box_path),
             "play_by_play": str(pbp_path)
@@ -78,7 +79,26 @@ def main() -> None:
             "away": away,
             "pbp_keys": list(pbp.keys())[:5] if isinstance(pbp, dict) else "n/a"
         }
-    }, indent=2))
+    }
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Download & cache NHL boxscore + PBP as local fixtures")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--game-id", type=int, help="NHL gamePk, e.g., 2025010041")
+    g.add_argument("--game-ids", type=int, nargs="+", help="Several gamePks, fetched concurrently")
+    ap.add_argument("--out-dir", default="nhl/fixtures", help="Directory to save fixtures")
+    ap.add_argument("--force", action="store_true", help="Re-download even if files exist")
+    ap.add_argument("--workers", type=int, default=8, help="Concurrent games with --game-ids")
+    args = ap.parse_args()
+
+    out = Path(args.out_dir)
+    if args.game_id is not None:
+        print(json.dumps(fetch_one(args.game_id, out, args.force), indent=2))
+        return
+
+    with ThreadPoolExecutor(max_workers=args.workers) as ex:
+        summaries = list(ex.map(lambda gid: fetch_one(gid, out, args.force), args.game_ids))
+    print(json.dumps(summaries, indent=2))
 
 if __name__ == "__main__":
     try:
@@ -1,43 +1,189 @@
 # File: nhl/scripts/tools/inspect_fixture.py
 #!/usr/bin/env python3
 from __future__ import annotations
-import json, sys
+import argparse, heapq, sys
 from pathlib import Path
 from collections import Counter, defaultdict
+from functools import lru_cache
+from itertools import chain, islice
+from operator import itemgetter
+from multiprocessing import Pool
+from typing import Any, Iterator
+import orjson
+
+try:  # optional: pip install msgspec — typed PBP decode
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:  # optional: pip install ijson — streamed PBP (--stream)
+    import ijson
+except ImportError:
+    ijson = None
+
+try:  # optional: pip install pysimdjson — lazy PBP parsing
+    import simdjson
+    # simdjson proxies quack like dict/list; only the fields read materialize
+    _OBJ = (dict, simdjson.Object)
+    _ARR = (list, simdjson.Array)
+except ImportError:
+    simdjson = None
+    _OBJ, _ARR = dict, list
 
 FIXTURE_DIR = Path("nhl/fixtures")
 
+_EMPTY: dict = {}  # shared read-only stand-in for a missing/odd "stats" node
+
+# normalized event type -> attempt bucket
+_EVENT_BUCKET = {
+    "SHOT": "sog", "SHOT-ON-GOAL": "sog", "SHOT_ON_GOAL": "sog",
+    "MISSED_SHOT": "missed", "MISSED-SHOT": "missed", "MISS": "missed",
+    "BLOCKED_SHOT": "blocked", "BLOCKED-SHOT": "blocked", "BLOCK": "blocked",
+}
+
+if msgspec is not None:
+    # Only the PBP fields the helpers below read; everything else in the payload
+    # is skipped by the decoder instead of becoming Python objects. Payloads that
+    # don't fit (odd types, non-object plays) fall back to the untyped parse.
+    class _Nest(msgspec.Struct, gc=False):  # play["details"] / play["result"]
+        typeDescKey: str | None = None
+        eventTypeId: str | None = None
+        playerId: int | str | None = None
+
+    class _PlayerRef(msgspec.Struct, gc=False):
+        id: int | str | None = None
+
+    class _PlayPlayer(msgspec.Struct, gc=False):
+        playerType: str | None = None
+        player: _PlayerRef | None = None
+        playerId: int | str | None = None
+
+    class Play(msgspec.Struct, gc=False):
+        typeDescKey: str | None = None
+        typeCode: int | str | None = None
+        eventTypeId: int | str | None = None
+        eventCode: int | str | None = None
+        details: _Nest | None = None
+        result: _Nest | None = None
+        players: list[_PlayPlayer] | None = None
+
+    class _PlaysNode(msgspec.Struct, gc=False):
+        allPlays: list[Play] | None = None
+        plays: list[Play] | None = None
+
+    class _LiveData(msgspec.Struct, gc=False):
+        plays: _PlaysNode | None = None
+
+    class PBPRoot(msgspec.Struct, gc=False):
+        plays: list[Play] | None = None
+        playByPlay: _PlaysNode | None = None
+        liveData: _LiveData | None = None
+        limitedScoring: Any = None
+        gameState: Any = None
+
+    # built once; decode calls reuse the compiled schema
+    _PBP_DEC = msgspec.json.Decoder(PBPRoot | list[Play])
+else:
+    Play = PBPRoot = None
+
 def load_fixture(game_id: int) -> tuple[dict, object]:
-    box = json.loads((FIXTURE_DIR / f"{game_id}_box.json").read_text(encoding="utf-8"))
+    box = orjson.loads((FIXTURE_DIR / f"{game_id}_box.json").read_bytes())
     pbp_path = FIXTURE_DIR / f"{game_id}_pbp.json"
-    pbp = json.loads(pbp_path.read_text(encoding="utf-8")) if pbp_path.exists() else {}
-    return box, pbp
+    if not pbp_path.exists():
+        return box, {}
+    data = pbp_path.read_bytes()
+    if msgspec is not None:
+        try:
+            return box, _PBP_DEC.decode(data)
+        except msgspec.MsgspecError:
+            pass  # off-schema payload -> untyped parse
+    if simdjson is not None:
+        # one parser per document: proxies stay valid as long as the doc lives
+        return box, simdjson.Parser().parse(data)
+    return box, orjson.loads(data)
+
+# where play arrays live, in plays_list's precedence order ("item" = root list)
+_PLAY_PREFIXES = ("plays.item", "playByPlay.allPlays.item", "playByPlay.plays.item",
+                  "liveData.plays.allPlays.item", "item")
+_SCALAR_EVENTS = frozenset(("null", "boolean", "integer", "double", "number", "string"))
+
+def iter_plays(pbp_path: Path, meta: dict) -> Iterator:
+    """
+    Stream plays out of a PBP file with ijson, one play in memory at a time.
+    The first play array seen is used for the whole file. Root-level
+    limitedScoring / gameState and the number of plays yielded land in `meta`.
+    """
+    meta["n_plays"] = 0
+    prefix = None
+    builder, depth = None, 0
+    with open(pbp_path, "rb") as f:
+        for pfx, event, value in ijson.parse(f, use_float=True):
+            if builder is not None:
+                builder.event(event, value)
+                if event == "start_map" or event == "start_array":
+                    depth += 1
+                elif event == "end_map" or event == "end_array":
+                    depth -= 1
+                    if depth == 0:
+                        meta["n_plays"] += 1
+                        yield builder.value
+                        builder = None
+                continue
+            if pfx == prefix or (prefix is None and pfx in _PLAY_PREFIXES):
+                if event == "start_map" or event == "start_array":
+                    prefix = pfx
+                    builder, depth = ijson.ObjectBuilder(), 1
+                    builder.event(event, value)
+                elif event in _SCALAR_EVENTS:
+                    prefix = pfx
+                    meta["n_plays"] += 1
+                    yield value
+            elif pfx in ("limitedScoring", "gameState") and event in _SCALAR_EVENTS:
+                meta[pfx] = value
 
 def plays_list(pbp_obj) -> list:
-    if isinstance(pbp_obj, list):
+    if type(pbp_obj) is PBPRoot:
+        if pbp_obj.plays is not None:
+            return pbp_obj.plays
+        pby = pbp_obj.playByPlay
+        if pby is not None:
+            if pby.allPlays is not None:
+                return pby.allPlays
+            if pby.plays is not None:
+                return pby.plays
+        live = pbp_obj.liveData
+        if live is not None and live.plays is not None and live.plays.allPlays is not None:
+            return live.plays.allPlays
+        return []
+    if isinstance(pbp_obj, _ARR):
         return pbp_obj
-    if isinstance(pbp_obj, dict):
+    if isinstance(pbp_obj, _OBJ):
         # modern api-web sometimes: {"plays": [...]} at root
-        if isinstance(pbp_obj.get("plays"), list):
+        if isinstance(pbp_obj.get("plays"), _ARR):
             return pbp_obj["plays"]
 
         # legacy-ish: {"playByPlay": {"allPlays": [...]}} or {"playByPlay":{"plays":[...]}}
         pby = pbp_obj.get("playByPlay")
-        if isinstance(pby, dict):
-            if isinstance(pby.get("allPlays"), list):
+        if isinstance(pby, _OBJ):
+            if isinstance(pby.get("allPlays"), _ARR):
                 return pby["allPlays"]
-            if isinstance(pby.get("plays"), list):
+            if isinstance(pby.get("plays"), _ARR):
                 return pby["plays"]
 
         # NHL statsapi style: {"liveData":{"plays":{"allPlays":[...]}}}
         live = pbp_obj.get("liveData")
-        if isinstance(live, dict):
+        if isinstance(live, _OBJ):
             plays = live.get("plays")
-            if isinstance(plays, dict) and isinstance(plays.get("allPlays"), list):
+            if isinstance(plays, _OBJ) and isinstance(plays.get("allPlays"), _ARR):
                 return plays["allPlays"]
 
     return []
 
+@lru_cache(maxsize=256)
+def _norm(s: str) -> str:
+    """Normalized, interned event label; plays reuse a handful of distinct strings."""
+    return sys.intern(s.strip().upper())
+
 def event_type(p: dict) -> str:
     """
     Prefer human-readable labels if present; otherwise fall back to numeric codes.
@@ -46,18 +192,18 @@ def event_type(p: dict) -> str:
     # 1) Prefer human-readable strings in common nests
     #    - modern: p["typeDescKey"] or p["details"]["typeDescKey"]
     #    - legacy: p["result"]["eventTypeId"] (e.g., "SHOT", "MISSED_SHOT")
-    for k in ("typeDescKey",):
-        v = p.get(k)
-        if isinstance(v, str) and v.strip():
-            return v.strip().upper()
+    # (_norm is cached and empty for blank labels, so it doubles as the test)
+    v = p.get("typeDescKey")
+    if type(v) is str and (et := _norm(v)):
+        return et
 
     for nest in ("details", "result"):
         d = p.get(nest)
-        if isinstance(d, dict):
+        if isinstance(d, _OBJ):
             for kk in ("typeDescKey", "eventTypeId"):
                 vv = d.get(kk)
-                if isinstance(vv, str) and vv.strip():
-                    return vv.strip().upper()
+                if type(vv) is str and (et := _norm(vv)):
+                    return et
 
     # 2) Fall back to numeric-ish codes
     for k in ("typeCode", "eventTypeId", "eventCode"):
@@ -70,30 +216,57 @@ def event_type(p: dict) -> str:
     # 3) Final fallback
     return "UNKNOWN"
 
-def _team_players_dict(team_obj: dict) -> dict[int, dict]:
+def _play_event_type(p: Play) -> str:
+    """event_type for a typed Play: same precedence, attribute access."""
+    v = p.typeDescKey
+    if v and (et := _norm(v)):
+        return et
+    for d in (p.details, p.result):
+        if d is not None:
+            for vv in (d.typeDescKey, d.eventTypeId):
+                if vv and (et := _norm(vv)):
+                    return et
+    for code in (p.typeCode, p.eventTypeId, p.eventCode):
+        if type(code) is int:
+            return f"CODE_{code}"
+        if code is not None and code.strip().isdigit():
+            return f"CODE_{code.strip()}"
+    return "UNKNOWN"
+
+def _iter_team_players(team_obj: dict) -> Iterator[dict]:
     """
     boxscore often has team_obj["players"] = { "<pid>": {...}, ... }
-    Return {pid: player_dict} with int keys. Gracefully handles "ID8480000" keys.
+    Yield each player dict whose key carries an id (handles "ID8480000" keys).
     """
     raw = (team_obj or {}).get("players") or {}
-    out: dict[int, dict] = {}
     if isinstance(raw, dict):
         for pid_s, pdata in raw.items():
-            try:
-                pid = int(pid_s)
-            except Exception:
-                try:
-                    pid = int("".join(ch for ch in str(pid_s) if ch.isdigit()))
-                except Exception:
-                    continue
-            out[pid] = pdata or {}
-    return out
+            if _pid_from_key(pid_s) is not None:
+                yield pdata or {}
 
-def _pos_code(player_dict: dict, default: str = "F") -> str:
-    code = (player_dict.get("positionCode") or player_dict.get("position") or "").upper()
+# deletes every non-digit in Latin-1; roster keys look like "8480000" / "ID8480000"
+_NON_DIGIT = str.maketrans("", "", "".join(chr(c) for c in range(256) if not chr(c).isdigit()))
+
+def _pid_from_key(pid_s) -> int | None:
+    """Player id from a roster key ("8480000" or "ID8480000"); None if it has none."""
+    try:
+        return int(pid_s)
+    except Exception:
+        try:
+            return int(str(pid_s).translate(_NON_DIGIT))
+        except Exception:
+            return None
+
+@lru_cache(maxsize=64)
+def _pos_code_str(code: str) -> str | None:
+    code = code.upper()
     if code in ("G","D","F"): return code
     if code in ("LW","RW","C"): return "F"
-    return default
+    return None
+
+def _pos_code(player_dict: dict, default: str = "F") -> str:
+    code = player_dict.get("positionCode") or player_dict.get("position") or ""
+    return _pos_code_str(code) or default
 
 def collect_skaters(box: dict) -> list[dict]:
     """
@@ -105,11 +278,12 @@ def collect_skaters(box: dict) -> list[dict]:
         team = box.get(side) or {}
 
         # 1) Preferred: players dict
-        players = _team_players_dict(team)
-        if players:
-            for _, pdata in players.items():
-                if _pos_code(pdata, "F") != "G":
-                    out.append(pdata)
+        found = False
+        for pdata in _iter_team_players(team):
+            found = True
+            if _pos_code(pdata, "F") != "G":
+                out.append(pdata)
+        if found:
             continue
 
         # 2) Fallback: arrays
@@ -124,6 +298,8 @@ def get_int(d: dict, *keys, default=None):
         v = d.get(k)
         if v is None: 
             continue
+        if type(v) is int:
+            return v
         try:
             return int(v)
         except Exception:
@@ -133,6 +309,12 @@ def get_int(d: dict, *keys, default=None):
                 continue
     return default
 
+_NUMERIC_TYPES = frozenset((int, float, bool))  # JSON scalars are exact types
+
+def _numericish(v) -> bool:
+    t = type(v)
+    return t in _NUMERIC_TYPES or (t is str and v.isdigit())
+
 def _strval(x) -> str:
     return "" if x is None else str(x)
 
@@ -173,14 +355,31 @@ def shooter_id_from_event(p: dict) -> int | None:
     """
     # modern
     d = p.get("details")
-    if isinstance(d, dict):
+    if isinstance(d, _OBJ):
         sid = d.get("playerId")
+        if sid is None:
+            return None
         try:
-            return int(sid) if sid is not None else None
+            return int(sid)
         except Exception:
             pass
 
     # legacy-ish list
+    return _sid_from_players(p)
+
+def _sid_from_details(p: dict) -> int | None:
+    """shooter_id_from_event for payloads whose plays only use details{} (api-web)."""
+    d = p.get("details")
+    if isinstance(d, _OBJ):
+        sid = d.get("playerId")
+        try:
+            return int(sid) if sid is not None else None
+        except Exception:
+            return None
+    return None
+
+def _sid_from_players(p: dict) -> int | None:
+    """shooter_id_from_event for payloads whose plays only use players[] (statsapi)."""
     for pl in p.get("players", []) or []:
         role = (pl.get("playerType") or "").lower()
         if role in ("shooter", "scorer"):
@@ -191,38 +390,95 @@ def shooter_id_from_event(p: dict) -> int | None:
                 continue
     return None
 
-def event_bucket(p: dict) -> str | None:
-    """
-    Map an event to one of: 'sog', 'missed', 'blocked', or None.
-    Uses `event_type(p)` you defined earlier.
-    """
-    et = event_type(p)  # already normalized to UPPER
-    if et in ("SHOT", "SHOT-ON-GOAL", "SHOT_ON_GOAL"):
-        return "sog"
-    if et in ("MISSED_SHOT", "MISSED-SHOT", "MISS"):
-        return "missed"
-    if et in ("BLOCKED_SHOT", "BLOCKED-SHOT", "BLOCK"):
-        return "blocked"
+def _play_shooter_id(p: Play) -> int | None:
+    """shooter_id_from_event for a typed Play."""
+    d = p.details
+    if d is not None:
+        sid = d.playerId
+        if sid is None:
+            return None
+        try:
+            return int(sid)
+        except Exception:
+            pass
+    return _play_sid_from_players(p)
+
+def _play_sid_from_details(p: Play) -> int | None:
+    d = p.details
+    if d is not None:
+        try:
+            return int(d.playerId) if d.playerId is not None else None
+        except Exception:
+            return None
+    return None
+
+def _play_sid_from_players(p: Play) -> int | None:
+    for pl in p.players or ():
+        if (pl.playerType or "").lower() in ("shooter", "scorer"):
+            pid = (pl.player.id if pl.player is not None else None) or pl.playerId
+            try:
+                return int(pid)
+            except Exception:
+                continue
     return None
 
-def aggregate_attempts_from_pbp(pbp_obj) -> dict[int, dict[str, int]]:
+def _play_shape(p, typed: bool) -> tuple[bool, bool]:
+    """(has details, has players) for one play; non-objects have neither."""
+    if typed:
+        return p.details is not None, p.players is not None
+    if isinstance(p, _OBJ):
+        return p.get("details") is not None, p.get("players") is not None
+    return False, False
+
+def scan_plays(plays) -> tuple[dict[str, int], dict[int, dict[str, int]]]:
     """
-    Return { player_id: { 'sog': n, 'missed': n, 'blocked': n } }
+    One pass over the plays, returning
+      - {event_type: count} over every play object (first-seen order)
+      - { player_id: { 'sog': n, 'missed': n, 'blocked': n, 'att': total } }
     Compatible with both api-web and statsapi-like payloads.
     """
-    out: dict[int, dict[str, int]] = defaultdict(lambda: {"sog": 0, "missed": 0, "blocked": 0})
-    plays = plays_list(pbp_obj)
+    it = iter(plays)
+    first = list(islice(it, 1))
+    typed = bool(first) and type(first[0]) is Play
+    if typed:
+        # schema-typed decode: every element is a Play, no per-play shape checks
+        et_of = _play_event_type
+        modern, legacy, sid_of = _play_sid_from_details, _play_sid_from_players, _play_shooter_id
+    else:
+        et_of = event_type
+        modern, legacy, sid_of = _sid_from_details, _sid_from_players, shooter_id_from_event
+
+    # A payload is normally one shape (api-web plays carry details{}, statsapi
+    # plays players[]): probe up to the first play that has either, bind the
+    # matching shooter lookup, then replay the probed plays. Any play carrying
+    # the other key (mixed payloads, or both keys) goes to the generic lookup,
+    # so counts match it exactly. Works on lists and streamed iterators.
+    probed = []
+    for p in chain(first, it):
+        probed.append(p)
+        has_d, has_pl = _play_shape(p, typed)
+        if has_d or has_pl:
+            if not (has_d and has_pl):
+                fast, other = (modern, 1) if has_d else (legacy, 0)
+
+                def sid_of(p, fast=fast, generic=sid_of, other=other):
+                    return generic(p) if _play_shape(p, typed)[other] else fast(p)
+            break
+    plays = chain(probed, it)
+    if not typed:
+        plays = (p for p in plays if isinstance(p, _OBJ))
+
+    counts: defaultdict[str, int] = defaultdict(int)
+    out: defaultdict[int, Counter] = defaultdict(Counter)
     for p in plays:
-        if not isinstance(p, dict):
-            continue
-        bucket = event_bucket(p)
-        if not bucket:
-            continue
-        sid = shooter_id_from_event(p)
-        if sid is None:
-            continue
-        out[sid][bucket] += 1
-    return dict(out)
+        et = et_of(p)
+        counts[et] += 1
+        bucket = _EVENT_BUCKET.get(et)
+        if bucket and (sid := sid_of(p)) is not None:
+            out[sid][bucket] += 1
+    agg = {pid: {"sog": c["sog"], "missed": c["missed"], "blocked": c["blocked"], "att": c.total()}
+           for pid, c in out.items()}
+    return counts, agg
 
 def to_int(x):
     try:
@@ -234,44 +490,30 @@ def to_int(x):
             return None
 
 
-def main() -> None:
-    if len(sys.argv) != 2:
-        print("usage: python nhl/scripts/tools/inspect_fixture.py <game_id>", file=sys.stderr)
-        sys.exit(2)
-
-    gid = int(sys.argv[1])
-    box, pbp = load_fixture(gid)
-
-    # --- PBP summary ---
-    plays = plays_list(pbp)
-    counts = Counter(event_type(p) for p in plays if isinstance(p, dict))
-    limited = False
-    if isinstance(pbp, dict):
-        limited = bool(pbp.get("limitedScoring") or (pbp.get("gameState") == "FINAL_LIM"))
-
-    print("=== PBP SUMMARY ===")
-    print(f"plays: {len(plays)} | unique event types: {len([k for k in counts if k])} | limitedScoring: {limited}")
-    for et, n in counts.most_common(20):
-        if et:
-            print(f"  {et:18s} {n}")
+def process(gid: int, stream: bool = False) -> dict:
+    """Scan one cached fixture and return a picklable summary (see print_summary)."""
+    if stream:
+        box = orjson.loads((FIXTURE_DIR / f"{gid}_box.json").read_bytes())
+        pbp_path = FIXTURE_DIR / f"{gid}_pbp.json"
+        meta: dict = {"n_plays": 0}
+        counts, agg = scan_plays(iter_plays(pbp_path, meta) if pbp_path.exists() else [])
+        n_plays = meta["n_plays"]
+        limited = bool(meta.get("limitedScoring") or (meta.get("gameState") == "FINAL_LIM"))
+    else:
+        box, pbp = load_fixture(gid)
+        plays = plays_list(pbp)
+        counts, agg = scan_plays(plays)
+        n_plays = len(plays)
+        limited = False
+        if type(pbp) is PBPRoot:
+            limited = bool(pbp.limitedScoring or (pbp.gameState == "FINAL_LIM"))
+        elif isinstance(pbp, _OBJ):
+            limited = bool(pbp.get("limitedScoring") or (pbp.get("gameState") == "FINAL_LIM"))
 
     # OPTIONAL: see top shooters by attempts
-    agg = aggregate_attempts_from_pbp(pbp)
-    if agg:
-        top = sorted(
-            ((pid, d["sog"], d["missed"], d["blocked"], d["sog"] + d["missed"] + d["blocked"])
-             for pid, d in agg.items()),
-            key=lambda x: x[4], reverse=True
-        )[:10]
-        print("\nTop attempts by PBP (pid  sog miss blk att):")
-        for pid, sog, miss, blk, att in top:
-            print(f"  {pid:9d}  {sog:3d} {miss:4d} {blk:3d} {att:4d}")
-    
+    top = heapq.nlargest(10, agg.items(), key=lambda kv: kv[1]["att"]) if agg else []
 
-    # --- Boxscore skater fields summary ---
     skaters = collect_skaters(box)
-    print("\n=== BOXSCORE SKATERS ===")
-    print(f"skaters listed: {len(skaters)}")
 
     # sample a few fields we care about (works for players-dict or array shapes)
     samples = []
@@ -279,31 +521,90 @@ def main() -> None:
         nm = name_of(p)
         pid = p.get("playerId") or p.get("id")
         # SOG / misses / blocks may be on top-level or within a nested "stats"
-        stats = p.get("stats") if isinstance(p.get("stats"), dict) else {}
-        sog  = get_int(p, "sog", "shotsOnGoal", "shots") or get_int(stats or {}, "sog", "shotsOnGoal", "shots")
-        miss = get_int(p, "missedShots", "missed") or get_int(stats or {}, "missedShots", "missed")
-        blk  = get_int(p, "blockedShotsTaken", "blocked") or get_int(stats or {}, "blockedShotsTaken", "blocked")
+        stats = p.get("stats")
+        stats = stats if type(stats) is dict else _EMPTY
+        sog  = get_int(p, "sog", "shotsOnGoal", "shots") or get_int(stats, "sog", "shotsOnGoal", "shots")
+        miss = get_int(p, "missedShots", "missed") or get_int(stats, "missedShots", "missed")
+        blk  = get_int(p, "blockedShotsTaken", "blocked") or get_int(stats, "blockedShotsTaken", "blocked")
         toi  = (p.get("toi") or p.get("timeOnIce")
-                or (stats or {}).get("toi") or (stats or {}).get("timeOnIce"))
+                or stats.get("toi") or stats.get("timeOnIce"))
         samples.append({"name": nm, "player_id": pid, "sog": sog, "miss": miss, "blk": blk, "toi": toi})
-    for row in samples:
-        print(f"  {row}")
 
     # show which per-player numeric keys exist across the roster (top-level + stats.*)
     numeric_keys = Counter()
     for p in skaters:
-        for k, v in p.items():
-            if isinstance(v, (int, float)) or (isinstance(v, str) and v.isdigit()):
-                numeric_keys[k] += 1
-        stats = p.get("stats") if isinstance(p.get("stats"), dict) else {}
-        for k, v in (stats or {}).items():
-            if isinstance(v, (int, float)) or (isinstance(v, str) and v.isdigit()):
-                numeric_keys[f"stats.{k}"] += 1
-
+        numeric_keys.update(k for k, v in p.items() if _numericish(v))
+        stats = p.get("stats")
+        if type(stats) is dict:
+            numeric_keys.update(f"stats.{k}" for k, v in stats.items() if _numericish(v))
     common_keys = [k for k, n in numeric_keys.most_common() if n >= max(3, len(skaters)//10)]
+
+    return {
+        "game_id": gid,
+        "n_plays": n_plays,
+        "n_types": len([k for k in counts if k]),
+        "limited": limited,
+        "event_counts": sorted(counts.items(), key=itemgetter(1), reverse=True)[:20],
+        "top": top,
+        "n_skaters": len(skaters),
+        "samples": samples,
+        "common_keys": common_keys[:30],
+    }
+
+
+def _process_stream(gid: int) -> dict:
+    return process(gid, stream=True)
+
+
+def print_summary(r: dict) -> None:
+    # --- PBP summary ---
+    print("=== PBP SUMMARY ===")
+    print(f"plays: {r['n_plays']} | unique event types: {r['n_types']} | limitedScoring: {r['limited']}")
+    for et, n in r["event_counts"]:
+        if et:
+            print(f"  {et:18s} {n}")
+
+    if r["top"]:
+        print("\nTop attempts by PBP (pid  sog miss blk att):")
+        for pid, d in r["top"]:
+            print(f"  {pid:9d}  {d['sog']:3d} {d['missed']:4d} {d['blocked']:3d} {d['att']:4d}")
+    
+
+    # --- Boxscore skater fields summary ---
+    print("\n=== BOXSCORE SKATERS ===")
+    print(f"skaters listed: {r['n_skaters']}")
+    for row in r["samples"]:
+        print(f"  {row}")
+
     print("\ncommon numeric-ish keys (appear often):")
-    for k in common_keys[:30]:
+    for k in r["common_keys"]:
         print(" ", k)
 
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Summarize a cached NHL boxscore + PBP fixture")
+    ap.add_argument("game_id", type=int, nargs="?")
+    ap.add_argument("--batch", action="store_true",
+                    help="read game_ids (whitespace-separated) from stdin and summarize them in a process pool")
+    ap.add_argument("--stream", action="store_true",
+                    help="stream PBP plays with ijson instead of parsing the whole file (low memory)")
+    args = ap.parse_args()
+
+    if args.batch == (args.game_id is not None):
+        ap.error("pass exactly one of game_id or --batch")
+    if args.stream and ijson is None:
+        sys.exit("--stream requires ijson (pip install ijson)")
+
+    if not args.batch:
+        print_summary(process(args.game_id, args.stream))
+        return
+
+    gids = [int(tok) for tok in sys.stdin.read().split()]
+    worker = _process_stream if args.stream else process
+    with Pool() as pool:
+        for r in pool.imap_unordered(worker, gids):
+            print(f"\n##### {r['game_id']} #####")
+            print_summary(r)
+
 if __name__ == "__main__":
     main()
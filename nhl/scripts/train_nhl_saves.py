@@ -25,27 +25,94 @@ Example run (after you’ve prepared a CSV like data/processed/nhl_saves_trainin
     --calibration-days 14
 """
 import argparse, os, json, hashlib, warnings, math
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Tuple, Dict, Optional
 
 import numpy as np
 import pandas as pd
 import pandas.api.types as ptypes
-from scipy.stats import nbinom, poisson
+from scipy.linalg import LinAlgError, cho_factor, cho_solve
+from scipy.special import betainc, pdtr, pdtrc
 from sklearn.linear_model import PoissonRegressor
 from sklearn.isotonic import IsotonicRegression
 from sklearn.metrics import log_loss, roc_auc_score
+from joblib import Memory, Parallel, delayed
 import statsmodels.api as sm
 
+try:  # optional: pip install pyarrow — multithreaded CSV parsing, filtered dataset scans
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+except ImportError:
+    pa = pc = pads = None
+CSV_ENGINE = "pyarrow" if pa is not None else "c"
+# arrow's CSV type-inference/conversion failures; the pandas C parser is the fallback
+ARROW_CSV_ERRORS = (pa.ArrowInvalid,) if pa is not None else ()
+
+try:  # optional: pip install numba — compiled ECE / Brier kernels
+    from numba import njit
+except ImportError:
+    njit = None
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+# joblib.Memory store for per-fold CV scores, used with --cv-cache only
+CV_CACHE_DIR = ".cache/nhl_saves_cv"
+# joblib.Memory keys on the cached function's own code and arguments, not on what it calls:
+# bump this whenever fit_nb_irls, line_metrics, the logp_* helpers, FeaturePrep or the
+# solver settings in the _score_*_path functions change, or old fold scores are reused.
+CV_CACHE_VERSION = 1
+
 # ----------------------------- Utilities ----------------------------- #
 
 def sha256_str(s: str) -> str:
     return hashlib.sha256(s.encode("utf-8")).hexdigest()
 
+def read_training_csv(path: str, usecols: List[str], date_col: str,
+                      lookback: Optional[pd.Timedelta] = None) -> pd.DataFrame:
+    """
+    Read `usecols` from the CSV, keeping only rows dated after max_date - lookback when given.
+    With pyarrow this is two passes: the date column alone for max_date, then a dataset scan
+    with the date filter pushed down, so rows outside the window are never materialized.
+    Arrow infers column types from the first block; a sparse column that is empty early and
+    holds strings/floats later fails to convert, and then the pandas C parser reads the file.
+    """
+    if lookback is not None and pads is not None:
+        try:
+            ds = pads.dataset(path, format="csv")
+            dtype = ds.schema.field(date_col).type
+            # only typed dates compare in arrow; string dates take the pandas path below
+            if pa.types.is_date(dtype) or pa.types.is_timestamp(dtype):
+                max_date = pc.max(ds.to_table(columns=[date_col])[date_col]).as_py()
+                start = pd.Timestamp(max_date) - lookback
+                bound = pa.scalar(start.date() if pa.types.is_date(dtype) else start.to_pydatetime(), type=dtype)
+                return ds.to_table(columns=usecols, filter=pc.field(date_col) > bound).to_pandas()
+        except ARROW_CSV_ERRORS:
+            pass
+
+    try:
+        df = pd.read_csv(path, usecols=usecols, engine=CSV_ENGINE)
+    except ARROW_CSV_ERRORS:
+        df = pd.read_csv(path, usecols=usecols, engine="c")
+    if lookback is not None:
+        dates = pd.to_datetime(df[date_col])
+        df = df[dates > dates.max() - lookback].reset_index(drop=True)
+    return df
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _brier(y, p):
+        acc = 0.0
+        for i in range(p.size):
+            d = p[i] - y[i]
+            acc += d * d
+        return acc / p.size
+else:
+    def _brier(y, p):
+        return np.mean((p - y) ** 2)
+
 def brier_score(y_true_prob: np.ndarray, y_pred_prob: np.ndarray) -> float:
-    return float(np.mean((y_pred_prob - y_true_prob) ** 2))
+    return float(_brier(np.asarray(y_true_prob), np.asarray(y_pred_prob)))
 
 def is_bool_or_binary(s: pd.Series) -> bool:
     if ptypes.is_bool_dtype(s):
@@ -59,33 +126,74 @@ def is_bool_or_binary(s: pd.Series) -> bool:
             return False
     return False
 
-def winsorize_numeric(s: pd.Series, p_low=0.01, p_high=0.99) -> pd.Series:
-    lo, hi = s.quantile(p_low), s.quantile(p_high)
-    return s.clip(lo, hi)
-
-def prepare_features(df: pd.DataFrame, feature_list: List[str]) -> pd.DataFrame:
-    """Cast numerics, handle booleans, one-hot categoricals, return numeric frame."""
-    X = df[feature_list].copy()
-    for c in X.columns:
-        col = X[c]
-        if is_bool_or_binary(col):
-            X[c] = pd.to_numeric(col, errors="coerce").fillna(0).astype(float)
-        elif ptypes.is_numeric_dtype(col):
-            X[c] = pd.to_numeric(col, errors="coerce").astype(float)
-            X[c] = winsorize_numeric(X[c]).fillna(X[c].median())
-        else:
-            X[c] = col.astype(str).fillna("other")
-    cat_cols = [c for c in X.columns if not ptypes.is_numeric_dtype(X[c])]
-    if cat_cols:
-        X = pd.get_dummies(X, columns=cat_cols, dummy_na=False)
-    # Ensure numeric dtype
-    for c in X.columns:
-        X[c] = pd.to_numeric(X[c], errors="coerce").fillna(0.0)
-    return X
+def column_kind(col: pd.Series) -> str:
+    """Which FeaturePrep branch a raw column takes: binary, continuous or categorical."""
+    if is_bool_or_binary(col):
+        return "binary"
+    if ptypes.is_numeric_dtype(col):
+        return "continuous"
+    return "categorical"
+
+@dataclass
+class FeaturePrep:
+    """
+    Feature preparation as a fit/transform pair. fit() learns each raw column's kind, its
+    1%/99% winsorize bounds + median (continuous) or level set (categorical) on TRAIN_CORE;
+    transform() maps any slice onto exactly that schema as a dense C-contiguous matrix, so
+    calibration/holdout get the training clipping and the same one-hot columns.
+    """
+    features: List[str] = field(default_factory=list)
+    kinds: Dict[str, str] = field(default_factory=dict)
+    bounds: Dict[str, Tuple[float, float, float]] = field(default_factory=dict)
+    cat_levels: Dict[str, List[str]] = field(default_factory=dict)
+    columns: List[str] = field(default_factory=list)
+
+    def fit(self, df: pd.DataFrame, feature_list: List[str]) -> "FeaturePrep":
+        self.features = list(feature_list)
+        self.kinds = {c: column_kind(df[c]) for c in self.features}
+        self.bounds, self.cat_levels = {}, {}
+        for c, kind in self.kinds.items():
+            if kind == "continuous":
+                s = pd.to_numeric(df[c], errors="coerce").astype(float)
+                self.bounds[c] = (s.quantile(0.01), s.quantile(0.99), s.median())
+            elif kind == "categorical":
+                self.cat_levels[c] = sorted(df[c].astype(str).unique())
+        # same layout get_dummies produced: numeric columns in order, then <col>_<level> blocks
+        self.columns = [c for c in self.features if self.kinds[c] != "categorical"]
+        self.columns += [f"{c}_{lv}" for c, levels in self.cat_levels.items() for lv in levels]
+        return self
+
+    def transform(self, df: pd.DataFrame, dtype=np.float32, add_const: bool = False) -> np.ndarray:
+        """Feature matrix in `columns` order; add_const puts a leading 1.0 column ("const") in front."""
+        X = np.empty((len(df), len(self.columns) + add_const), dtype=dtype)
+        j = int(add_const)
+        if add_const:
+            X[:, 0] = 1.0
+        for c in self.features:
+            kind = self.kinds[c]
+            if kind == "categorical":
+                continue
+            v = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+            if kind == "continuous":
+                lo, hi, med = self.bounds[c]
+                v = np.clip(v, lo, hi)
+                v[np.isnan(v)] = med
+            v[np.isnan(v)] = 0.0
+            X[:, j] = v
+            j += 1
+        for c, levels in self.cat_levels.items():
+            vals = df[c].astype(str).to_numpy(dtype=object)
+            X[:, j:j + len(levels)] = np.equal.outer(vals, np.asarray(levels, dtype=object))
+            j += len(levels)
+        return X
 
 def make_temporal_folds(df: pd.DataFrame, date_col: str, n_folds: int, gap_days:int=2) -> List[Tuple[np.ndarray, np.ndarray]]:
-    df_sorted = df.sort_values(date_col).reset_index(drop=True)
-    dates = pd.to_datetime(df_sorted[date_col]).values.astype("datetime64[D]")
+    """
+    Expanding-window folds over df, which must already be sorted by date_col (main sorts once):
+    positions are contiguous ranges, found with searchsorted on the day array
+    (train = days before start - gap, val = [start, end)).
+    """
+    dates = pd.to_datetime(df[date_col]).values.astype("datetime64[D]")
     unique_days = np.unique(dates)
     if len(unique_days) < max(3, n_folds + 2):
         return []
@@ -95,38 +203,104 @@ def make_temporal_folds(df: pd.DataFrame, date_col: str, n_folds: int, gap_days:
         start, end = edges[k], edges[k+1]
         if end - start < 3:
             continue
-        val_days = unique_days[start:end]
-        train_days = unique_days[: max(0, start - gap_days)]
-        tr_idx = df_sorted.index[np.isin(dates, train_days)]
-        va_idx = df_sorted.index[np.isin(dates, val_days)]
-        if len(tr_idx)==0 or len(va_idx)==0:
+        n_train_days = max(0, start - gap_days)
+        tr_end = np.searchsorted(dates, unique_days[n_train_days], side="left") if n_train_days else 0
+        va_start = np.searchsorted(dates, unique_days[start], side="left")
+        va_end = np.searchsorted(dates, unique_days[end - 1], side="right")
+        if tr_end == 0 or va_end == va_start:
             continue
-        folds.append((tr_idx.values, va_idx.values))
+        folds.append((np.arange(tr_end), np.arange(va_start, va_end)))
     return folds
 
-def prob_over_poisson(mu: np.ndarray, line: float) -> np.ndarray:
-    k = int(math.floor(line))
-    return 1.0 - poisson.cdf(k, mu)
-
-def prob_over_nb(mu: np.ndarray, alpha: float, line: float) -> np.ndarray:
-    a = max(alpha, 1e-8)
-    r = 1.0 / a
-    p = r / (r + mu)
-    k = int(math.floor(line))
-    return 1.0 - nbinom.cdf(k, r, p)
+# The tails call the scipy.special ufuncs directly (exact survival functions, one broadcast
+# call over (n_samples, n_lines), no rv_discrete argument checking). NB uses betainc rather
+# than nbdtr/nbdtrc, which truncate r = 1/alpha to an integer.
+
+def prob_over_poisson(mu: np.ndarray, line) -> np.ndarray:
+    """P(Y > line); `line` may be a scalar or an array that broadcasts against mu."""
+    return pdtrc(np.floor(line), mu)
+
+def prob_over_nb(mu: np.ndarray, alpha: float, line) -> np.ndarray:
+    """NB analogue of prob_over_poisson (alpha = dispersion, Var = mu + alpha*mu^2)."""
+    r = 1.0 / max(alpha, 1e-8)
+    # P(X > k) = I_q(k+1, r) with q = 1-p = mu / (r + mu)
+    return betainc(np.floor(line) + 1, r, mu / (r + mu))
+
+def prob_over_poisson_multi(mu: np.ndarray, lines) -> np.ndarray:
+    """P(Y > L) for every line at once: (n_samples, n_lines)."""
+    return prob_over_poisson(mu[:, None], np.asarray(lines, dtype=float)[None, :])
+
+def prob_over_nb_multi(mu: np.ndarray, alpha: float, lines) -> np.ndarray:
+    """NB analogue of prob_over_poisson_multi."""
+    return prob_over_nb(mu[:, None], alpha, np.asarray(lines, dtype=float)[None, :])
+
+def logp_over_under_poisson(mu: np.ndarray, lines) -> Tuple[np.ndarray, np.ndarray]:
+    """(log P(Y > L), log P(Y <= L)) per line, (n_samples, n_lines) each (== poisson.logsf/logcdf)."""
+    ks = np.floor(np.asarray(lines, dtype=float))[None, :]
+    with np.errstate(divide="ignore"):
+        return np.log(pdtrc(ks, mu[:, None])), np.log(pdtr(ks, mu[:, None]))
+
+def logp_over_under_nb(mu: np.ndarray, alpha: float, lines) -> Tuple[np.ndarray, np.ndarray]:
+    """NB analogue of logp_over_under_poisson (== nbinom.logsf/logcdf)."""
+    r = 1.0 / max(alpha, 1e-8)
+    ks = np.floor(np.asarray(lines, dtype=float))[None, :]
+    q = (mu / (r + mu))[:, None]
+    sf = betainc(ks + 1, r, q)
+    cdf = betainc(r, ks + 1, 1.0 - q)
+    with np.errstate(divide="ignore"):
+        # log1p(-sf) keeps precision when the cdf is close to 1 (as scipy's nbinom._logcdf)
+        return np.log(sf), np.where(cdf > 0.5, np.log1p(-sf), np.log(cdf))
+
+def log_loss_from_logp(Y_over: np.ndarray, logp_over: np.ndarray, logp_under: np.ndarray) -> np.ndarray:
+    """Per-line binary log loss from log-probabilities; no exp round trip, no 1e-6 clipping floor."""
+    return -np.where(Y_over == 1, logp_over, logp_under).mean(axis=0)
+
+def line_metrics(Y_over: np.ndarray, logp_over: np.ndarray, logp_under: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Mean Brier / log loss / AUC across the line columns of Y_over. Log loss uses the exact
+    log tail probabilities (clipping at 1e-6 put a floor under far tails and biased the alpha
+    choice); only Brier/AUC see the clipped probabilities.
+    """
+    P = np.clip(np.exp(logp_over), 1e-6, 1 - 1e-6)
+    briers = ((P - Y_over) ** 2).mean(axis=0)
+    lls = log_loss_from_logp(Y_over, logp_over, logp_under)
+    aucs = []
+    for j in range(Y_over.shape[1]):
+        y_over = Y_over[:, j]
+        if y_over.min() != y_over.max():
+            aucs.append(roc_auc_score(y_over, P[:, j]))
+    return float(np.nanmean(briers)), float(np.nanmean(lls)), (float(np.nanmean(aucs)) if aucs else np.nan)
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _ece(p, y, n_bins):
+        # one pass: bin b = [b/n_bins, (b+1)/n_bins), accumulate per-bin sums
+        sum_p = np.zeros(n_bins)
+        sum_y = np.zeros(n_bins)
+        cnt = np.zeros(n_bins)
+        for i in range(p.size):
+            b = min(int(p[i] * n_bins), n_bins - 1)
+            sum_p[b] += p[i]
+            sum_y[b] += y[i]
+            cnt[b] += 1.0
+        ece = 0.0
+        for b in range(n_bins):
+            if cnt[b] > 0:
+                ece += (cnt[b] / p.size) * abs(sum_p[b] / cnt[b] - sum_y[b] / cnt[b])
+        return ece
+else:
+    def _ece(p, y, n_bins):
+        # same single pass in C: per-bin count / sum_p / sum_y via bincount
+        idx = np.minimum((p * n_bins).astype(np.int64), n_bins - 1)
+        cnt = np.bincount(idx, minlength=n_bins)
+        sum_p = np.bincount(idx, weights=p, minlength=n_bins)
+        sum_y = np.bincount(idx, weights=y.astype(np.float64), minlength=n_bins)
+        nz = cnt > 0
+        return np.sum(cnt[nz] / len(y) * np.abs(sum_p[nz] / cnt[nz] - sum_y[nz] / cnt[nz]))
 
 def compute_ece(y_true: np.ndarray, p_pred: np.ndarray, n_bins: int = 10) -> float:
-    p = np.clip(p_pred, 1e-6, 1 - 1e-6)
-    bins = np.linspace(0.0, 1.0, n_bins + 1)
-    idx = np.digitize(p, bins) - 1
-    ece, N = 0.0, len(y_true)
-    for b in range(n_bins):
-        mask = (idx == b)
-        if not np.any(mask): continue
-        p_mean = float(p[mask].mean())
-        y_mean = float(y_true[mask].mean())
-        ece += (mask.sum() / N) * abs(p_mean - y_mean)
-    return float(ece)
+    p = np.clip(np.asarray(p_pred, dtype=np.float64), 1e-6, 1 - 1e-6)
+    return float(_ece(p, np.asarray(y_true), n_bins))
 
 @dataclass
 class CVResult:
@@ -138,137 +312,238 @@ class CVResult:
 
 # ----------------------------- Core Training ----------------------------- #
 
+def _score_poisson_path(alphas: List[float], Xc_all: np.ndarray, y: np.ndarray, tr_idx: np.ndarray,
+                        va_idx: np.ndarray, lines: np.ndarray, Y_over: np.ndarray) -> List[Tuple[float, float, float]]:
+    """
+    Fit sklearn Poisson for each alpha on one fold; return (brier, logloss, auc) averaged over
+    lines, in the order of `alphas`. The alphas are fitted as a regularization path, largest
+    first, with warm_start so each L-BFGS solve starts from its neighbour's coefficients.
+    Y_over is the fold's precomputed (len(va_idx), n_lines) int8 matrix of y[va_idx] > line;
+    Xc_all is [1 | X], sklearn fits its own intercept so the constant column is dropped here.
+    """
+    Xt, yt, Xv = Xc_all[tr_idx, 1:], y[tr_idx], Xc_all[va_idx, 1:]
+    model = PoissonRegressor(fit_intercept=True, max_iter=1000, tol=1e-7, warm_start=True)
+    out = [None] * len(alphas)
+    for i in sorted(range(len(alphas)), key=lambda i: -alphas[i]):
+        model.set_params(alpha=alphas[i]).fit(Xt, yt)
+        mu_val = np.clip(model.predict(Xv), 1e-6, None)
+        out[i] = line_metrics(Y_over, *logp_over_under_poisson(mu_val, lines))
+    return out
+
+def fit_nb_irls(X: np.ndarray, y: np.ndarray, alpha: float, max_iter: int = 25, tol: float = 1e-7) -> np.ndarray:
+    """
+    NB2 GLM (log link, Var = mu + alpha*mu^2) by IRLS on the normal equations.
+    X must already carry the constant column. Same fixed point as sm.GLM(NegativeBinomial(alpha)),
+    minus the SVD solves and results wrapper: Cholesky on X'WX, with a minimum-norm lstsq solve
+    only when the design is rank deficient (e.g. an all-zero column).
+    """
+    y = np.asarray(y, dtype=float)
+    mu = y + 0.1
+    eta = np.log(mu)
+    beta = np.zeros(X.shape[1])
+    for _ in range(max_iter):
+        w = mu / (1.0 + alpha * mu)
+        z = eta + (y - mu) / mu
+        XtW = X.T * w
+        A, b = XtW @ X, XtW @ z
+        try:
+            beta_new = cho_solve(cho_factor(A), b)
+        except LinAlgError:
+            beta_new = np.linalg.lstsq(A, b, rcond=None)[0]
+        if not np.all(np.isfinite(beta_new)):
+            raise LinAlgError("NB IRLS diverged")
+        done = np.max(np.abs(beta_new - beta)) <= tol * (1.0 + np.max(np.abs(beta_new)))
+        beta = beta_new
+        eta = X @ beta
+        mu = np.exp(eta)
+        if done:
+            break
+    return beta
+
+def _score_nb_path(alphas: List[float], Xc_all: np.ndarray, y: np.ndarray, tr_idx: np.ndarray, va_idx: np.ndarray,
+                   lines: np.ndarray, Y_over: np.ndarray) -> List[Tuple[float, float, float]]:
+    """
+    NB (fit_nb_irls) analogue of _score_poisson_path, one independent fit per dispersion alpha
+    (falls back to a Poisson GLM if NB fails). Xc_all is [1 | X], used as is.
+    """
+    yt = y[tr_idx]
+    Xt_sm, Xv_sm = Xc_all[tr_idx], Xc_all[va_idx]
+    out = []
+    for disp_alpha in alphas:
+        try:
+            beta = fit_nb_irls(Xt_sm, yt, disp_alpha)
+        except (LinAlgError, ValueError):
+            beta = sm.GLM(yt, Xt_sm, family=sm.families.Poisson()).fit(maxiter=200, tol=1e-8).params
+        mu_val = np.clip(np.exp(Xv_sm @ beta), 1e-6, None)
+        out.append(line_metrics(Y_over, *logp_over_under_nb(mu_val, disp_alpha, lines)))
+    return out
+
+def _cached_fold_score(version: int, family: str, alpha: float, *fold_args) -> List[Tuple[float, float, float]]:
+    """
+    One (family, alpha) score on one fold, the unit memoized on disk with --cv-cache.
+    `version` is CV_CACHE_VERSION, part of the cache key; Poisson is fitted cold here.
+    """
+    path = _score_poisson_path if family == "poisson" else _score_nb_path
+    return path([alpha], *fold_args)
+
 def run_cv_and_select(
     df_train_core: pd.DataFrame,
     date_col: str,
     label_col: str,
-    features: List[str],
+    Xc_all: np.ndarray,
     eval_lines: List[float],
     n_folds: int,
     alpha_grid_poisson: List[float],
     alpha_grid_nb: List[float],
+    n_jobs: int = -1,
+    halving: bool = True,
+    cache_dir: Optional[str] = None,
 ) -> Tuple[CVResult, Dict]:
-    X_raw = prepare_features(df_train_core, features)
+    """Xc_all is the prepared TRAIN_CORE matrix with its constant column, row-aligned with df_train_core.
+
+    (alpha, fold) fits are independent, so each round goes to one joblib pool; loky
+    memmaps Xc_all instead of pickling it per task. With halving, every alpha is scored
+    on the first fold only, and just the better half of each grid (by Brier, at least 2)
+    is scored on the remaining folds; the others stay in the diagnostics with their
+    one-fold scores and "eliminated_at_round": 1.
+
+    With cache_dir, fold scores are memoized on disk by joblib.Memory (hash of
+    CV_CACHE_VERSION, the fold's data, the alpha and lines), one entry per (family, alpha,
+    fold), so rerunning with a changed grid only fits what is new. Cached Poisson alphas are
+    fitted cold rather than as a warm-started path, so their scores can differ from an
+    uncached run within solver tolerance.
+    """
     y = df_train_core[label_col].astype(int).values
     folds = make_temporal_folds(df_train_core, date_col, n_folds, gap_days=2)
     if not folds:
         raise ValueError("Temporal CV failed to create folds. Check date coverage.")
 
-    # Poisson grid
-    poi_results = []
-    for a in alpha_grid_poisson:
-        briers, lls, aucs = [], [], []
-        for tr_idx, va_idx in folds:
-            Xt, Xv = X_raw.iloc[tr_idx], X_raw.iloc[va_idx]
-            yt, yv = y[tr_idx], y[va_idx]
-            model = PoissonRegressor(alpha=a, fit_intercept=True, max_iter=1000, tol=1e-7)
-            model.fit(Xt, yt)
-            mu_val = np.clip(model.predict(Xv), 1e-6, None)
-            b_line, ll_line, auc_line = [], [], []
-            for L in eval_lines:
-                y_over = (yv > L).astype(int)
-                p_over = np.clip(prob_over_poisson(mu_val, L), 1e-6, 1 - 1e-6)
-                b_line.append(brier_score(y_over, p_over))
-                try: ll_line.append(log_loss(y_over, p_over, labels=[0,1]))
-                except ValueError: ll_line.append(np.nan)
-                if y_over.min() != y_over.max():
-                    auc_line.append(roc_auc_score(y_over, p_over))
-            briers.append(np.nanmean(b_line)); lls.append(np.nanmean(ll_line)); aucs.append(np.nanmean(auc_line) if auc_line else np.nan)
-        poi_results.append(CVResult("poisson", {"alpha": a}, float(np.nanmean(briers)), float(np.nanmean(lls)), float(np.nanmean(aucs))))
-
-    # Negative Binomial grid (statsmodels GLM)
-    nb_results = []
-    for disp_alpha in alpha_grid_nb:
-        briers, lls, aucs = [], [], []
-        for tr_idx, va_idx in folds:
-            Xt, Xv = X_raw.iloc[tr_idx], X_raw.iloc[va_idx]
-            yt, yv = y[tr_idx], y[va_idx]
-            Xt_sm = sm.add_constant(Xt, has_constant="add")
-            Xv_sm = sm.add_constant(Xv, has_constant="add")
-            fam = sm.families.NegativeBinomial(alpha=disp_alpha)
-            try:
-                nb_model = sm.GLM(yt, Xt_sm, family=fam)
-                nb_res = nb_model.fit(maxiter=200, tol=1e-8)
-            except Exception:
-                nb_model = sm.GLM(yt, Xt_sm, family=sm.families.Poisson())
-                nb_res = nb_model.fit(maxiter=200, tol=1e-8)
-            mu_val = np.clip(nb_res.predict(Xv_sm), 1e-6, None)
-            b_line, ll_line, auc_line = [], [], []
-            for L in eval_lines:
-                y_over = (yv > L).astype(int)
-                p_over = np.clip(prob_over_nb(mu_val, disp_alpha, L), 1e-6, 1 - 1e-6)
-                b_line.append(brier_score(y_over, p_over))
-                try: ll_line.append(log_loss(y_over, p_over, labels=[0,1]))
-                except ValueError: ll_line.append(np.nan)
-                if y_over.min() != y_over.max():
-                    auc_line.append(roc_auc_score(y_over, p_over))
-            briers.append(np.nanmean(b_line)); lls.append(np.nanmean(ll_line)); aucs.append(np.nanmean(auc_line) if auc_line else np.nan)
-        nb_results.append(CVResult("neg_binomial", {"disp_alpha": disp_alpha}, float(np.nanmean(briers)), float(np.nanmean(lls)), float(np.nanmean(aucs))))
-
-    all_results = poi_results + nb_results
+    lines = np.asarray(eval_lines, dtype=float)
+    # y > line per validation fold depends on neither family nor alpha: build it once
+    Y_over_by_fold = [(y[va_idx][:, None] > lines[None, :]).astype(np.int8) for _, va_idx in folds]
+
+    cached = Memory(cache_dir, verbose=0).cache(_cached_fold_score) if cache_dir else None
+
+    # family -> (param name, grid); scores keyed by (family, grid position), one entry per fold
+    specs = {"poisson": ("alpha", alpha_grid_poisson), "neg_binomial": ("disp_alpha", alpha_grid_nb)}
+    scores: Dict[Tuple[str, int], List[Tuple[float, float, float]]] = {
+        (fam, g): [] for fam, (_, grid) in specs.items() for g in range(len(grid))
+    }
+
+    def score(parallel, keys, fold_ids):
+        # a fold's Poisson alphas run as one warm-started path; every NB fit is its own task
+        poi = [g for fam, g in keys if fam == "poisson"]
+        nb = [g for fam, g in keys if fam == "neg_binomial"]
+        groups, calls = [], []
+        for k in fold_ids:
+            fold_args = (Xc_all, y, *folds[k], lines, Y_over_by_fold[k])
+            if cached is not None:
+                # cached: one task (and one cache entry) per family, alpha and fold
+                for fam, g in keys:
+                    groups.append([(fam, g)])
+                    calls.append(delayed(cached)(CV_CACHE_VERSION, fam, specs[fam][1][g], *fold_args))
+                continue
+            if poi:
+                groups.append([("poisson", g) for g in poi])
+                calls.append(delayed(_score_poisson_path)([alpha_grid_poisson[g] for g in poi], *fold_args))
+            for g in nb:
+                groups.append([("neg_binomial", g)])
+                calls.append(delayed(_score_nb_path)([alpha_grid_nb[g]], *fold_args))
+        for group, out in zip(groups, parallel(calls)):
+            for key, r in zip(group, out):
+                scores[key].append(r)
+
+    with Parallel(n_jobs=n_jobs, backend="loky") as parallel:
+        if halving and len(folds) > 1:
+            score(parallel, list(scores), [0])
+            survivors = []
+            for fam, (_, grid) in specs.items():
+                ranked = sorted(range(len(grid)), key=lambda g: scores[(fam, g)][0][0])
+                survivors += [(fam, g) for g in ranked[:max(2, math.ceil(len(grid) / 2))]]
+            score(parallel, survivors, range(1, len(folds)))
+        else:
+            survivors = list(scores)
+            score(parallel, survivors, range(len(folds)))
+
+    kept = set(survivors)
+    all_results, diagnostics = [], {"folds": len(folds)}
+    for fam, (param, grid) in specs.items():
+        rows = []
+        for g, a in enumerate(grid):
+            b, ll, auc = np.array(scores[(fam, g)], dtype=float).T
+            r = CVResult(fam, {param: a}, float(np.nanmean(b)), float(np.nanmean(ll)), float(np.nanmean(auc)))
+            if (fam, g) in kept:
+                all_results.append(r)
+                rows.append(r.__dict__)
+            else:
+                rows.append({**r.__dict__, "eliminated_at_round": 1})
+        diagnostics[fam] = rows
+
     best = min(all_results, key=lambda r: r.mean_brier)
-    diagnostics = {"folds": len(folds), "poisson": [r.__dict__ for r in poi_results], "neg_binomial": [r.__dict__ for r in nb_results]}
     return best, diagnostics
 
-def fit_winner(family: str, params: Dict, df_fit: pd.DataFrame, features: List[str], label_col: str):
-    X = prepare_features(df_fit, features)
-    y = df_fit[label_col].astype(int).values
+def fit_winner(family: str, params: Dict, Xc: np.ndarray, columns: List[str], y: np.ndarray):
+    """Refit the CV winner on [1 | X] (Xc); `columns` names the X part."""
     if family == "poisson":
         model = PoissonRegressor(alpha=params["alpha"], fit_intercept=True, max_iter=2000, tol=1e-8)
-        model.fit(X, y)
-        artifact = {"coef": model.coef_.tolist(), "intercept": float(model.intercept_), "feature_order": list(X.columns)}
+        model.fit(Xc[:, 1:], y)
+        artifact = {"coef": model.coef_.tolist(), "intercept": float(model.intercept_), "feature_order": list(columns)}
         return ("poisson", model, artifact)
     else:
-        Xt_sm = sm.add_constant(X, has_constant="add")
         fam = sm.families.NegativeBinomial(alpha=params["disp_alpha"])
-        nb_model = sm.GLM(y, Xt_sm, family=fam)
+        nb_model = sm.GLM(y, Xc, family=fam)
         nb_res = nb_model.fit(maxiter=200, tol=1e-8)
-        artifact = {"params": nb_res.params.tolist(), "feature_order_with_const": list(Xt_sm.columns)}
+        artifact = {"params": nb_res.params.tolist(), "feature_order_with_const": ["const", *columns]}
         return ("neg_binomial", nb_res, artifact)
 
-def predict_family(model_obj, family: str, X: pd.DataFrame, nb_alpha: Optional[float], line: float) -> np.ndarray:
+def predict_mu(model_obj, family: str, Xc: np.ndarray) -> np.ndarray:
+    """Fitted mean exp(X beta) for the winner on [1 | X], floored at 1e-6."""
     if family == "poisson":
-        mu = np.clip(model_obj.predict(X), 1e-6, None)
-        return np.clip(prob_over_poisson(mu, line), 1e-6, 1-1e-6)
-    else:
-        X_sm = sm.add_constant(X, has_constant="add")
-        mu = np.clip(model_obj.predict(X_sm), 1e-6, None)
-        return np.clip(prob_over_nb(mu, nb_alpha, line), 1e-6, 1-1e-6)
+        return np.clip(model_obj.predict(Xc[:, 1:]), 1e-6, None)
+    return np.clip(model_obj.predict(Xc), 1e-6, None)
+
+def tail_probs(mu: np.ndarray, family: str, lines: List[float], nb_alpha: Optional[float]) -> np.ndarray:
+    """Clipped P(Y > L) for every line from one mu: (n_samples, n_lines)."""
+    P = prob_over_poisson_multi(mu, lines) if family == "poisson" else prob_over_nb_multi(mu, nb_alpha, lines)
+    return np.clip(P, 1e-6, 1-1e-6)
 
 def fit_isotonic_per_line(
     model_obj, family: str, params: Dict,
-    df_cal: pd.DataFrame, features: List[str], label_col: str, eval_lines: List[float],
+    df_cal: pd.DataFrame, prep: FeaturePrep, label_col: str, eval_lines: List[float],
     min_per_class: int = 10,   # tolerate smaller windows; still guarded by improvement test
-    improve_tol: float = 0.005
+    improve_tol: float = 0.005,
+    dtype=np.float32,
 ) -> Dict[str, Dict]:
     """Fit isotonic on calibration window; keep per-line only if it improves LL or ECE."""
     if df_cal is None or df_cal.empty:
         return {}
-    Xc = prepare_features(df_cal, features)
+    Xc_cal = prep.transform(df_cal, dtype, add_const=True)
     yc = df_cal[label_col].astype(int).values
+    Y_over = (yc[:, None] > np.asarray(eval_lines, dtype=float)[None, :]).astype(np.int8)
+    pos_counts = Y_over.sum(axis=0)
+    P_raw = tail_probs(predict_mu(model_obj, family, Xc_cal), family, eval_lines, params.get("disp_alpha"))
     out = {}
-    for L in eval_lines:
-        y_over = (yc > L).astype(int)
-        n_pos, n_neg = int(y_over.sum()), int(len(y_over) - y_over.sum())
+    for j, L in enumerate(eval_lines):
+        y_over = Y_over[:, j]
+        n_pos = int(pos_counts[j]); n_neg = len(y_over) - n_pos
         if n_pos < min_per_class or n_neg < min_per_class:
             print(f"ℹ️  Skipping calibration for line {L}: insufficient class balance (pos={n_pos}, neg={n_neg}, need ≥{min_per_class} each).")
             continue
-        p_raw = predict_family(model_obj, family, Xc, params.get("disp_alpha"), L)
-        p_raw = np.clip(p_raw, 1e-6, 1-1e-6)
+        p_raw = P_raw[:, j]
         raw_ll  = float(log_loss(y_over, p_raw, labels=[0,1]))
         raw_ece = compute_ece(y_over, p_raw, n_bins=10)
         iso = IsotonicRegression(out_of_bounds="clip", y_min=0.0, y_max=1.0, increasing=True)
         iso.fit(p_raw, y_over)
-        grid_x = np.linspace(0.0, 1.0, 101)
-        grid_y = iso.predict(grid_x)
-        p_cal  = np.clip(np.interp(p_raw, grid_x, grid_y), 1e-6, 1-1e-6)
+        # PAV fit is a handful of steps: keep its exact knots rather than resampling to a grid
+        x_th, y_th = iso.X_thresholds_, iso.y_thresholds_
+        p_cal  = np.clip(iso.transform(p_raw), 1e-6, 1-1e-6)
         cal_ll  = float(log_loss(y_over, p_cal, labels=[0,1]))
         cal_ece = compute_ece(y_over, p_cal, n_bins=10)
         if (raw_ll - cal_ll) >= improve_tol or (raw_ece - cal_ece) >= improve_tol:
             out[str(L)] = {
                 "method": "isotonic",
-                "grid_x": grid_x.tolist(),
-                "grid_y": grid_y.tolist(),
+                "x_thresholds": x_th.tolist(),
+                "y_thresholds": y_th.tolist(),
                 "n": int(len(y_over)),
                 "diagnostics": {
                     "raw_ll": raw_ll, "cal_ll": cal_ll,
@@ -308,6 +583,7 @@ def save_artifacts(
     metrics_holdout_cal: Optional[Dict[str, Dict]],
     model_subartifact: Dict,
     calibration_payload: Optional[Dict],
+    column_kinds: Optional[Dict[str, str]] = None,
 ):
     os.makedirs(out_dir, exist_ok=True)
     model_artifact = {
@@ -316,6 +592,7 @@ def save_artifacts(
         "feature_key": feature_key,
         "eval_lines": eval_lines,
         "calibration": calibration_payload or {},
+        "column_kinds": column_kinds or {},  # raw feature -> binary/continuous/categorical
     }
     model_artifact.update({"sklearn_poisson": model_subartifact} if best.family=="poisson" else {"statsmodels_nb": model_subartifact})
     with open(os.path.join(out_dir, "MODEL_ARTIFACT.json"), "w") as f:
@@ -356,18 +633,24 @@ def main():
     ap.add_argument("--n-folds", type=int, default=5)
     ap.add_argument("--holdout-days", type=int, default=14)
     ap.add_argument("--calibration-days", type=int, default=7)
+    ap.add_argument("--train-days", type=int, default=None,
+                    help="TRAIN_CORE length in days before the calibration window (default: all history)")
     ap.add_argument("--alpha-grid-poisson", default="0.0,0.0001,0.001,0.01,0.1")
     ap.add_argument("--alpha-grid-nb", default="0.2,0.5,1.0,2.0")
+    prec = ap.add_mutually_exclusive_group()
+    prec.add_argument("--float32", dest="dtype", action="store_const", const=np.float32,
+                      help="float32 design matrices (default)")
+    prec.add_argument("--float64", dest="dtype", action="store_const", const=np.float64,
+                      help="float64 design matrices, for badly collinear feature sets")
+    ap.set_defaults(dtype=np.float32)
+    ap.add_argument("--full-grid", action="store_true",
+                    help="score every alpha on every fold (default: successive halving after the first fold)")
+    ap.add_argument("--cv-cache", action="store_true",
+                    help=f"memoize CV fold scores on disk in {CV_CACHE_DIR} (bump CV_CACHE_VERSION after "
+                         "changing the fitting/metric code)")
+    ap.add_argument("--n-jobs", type=int, default=-1, help="joblib workers for the CV grid (-1 = all cores)")
     args = ap.parse_args()
 
-    # Load data
-    df = pd.read_csv(args.csv)
-    if args.date_col not in df.columns:
-        raise ValueError(f"Missing date column: {args.date_col}")
-    if args.label_col not in df.columns:
-        raise ValueError(f"Missing label column: {args.label_col}")
-    df[args.date_col] = pd.to_datetime(df[args.date_col])
-
     # Load feature registry
     with open(args.feature_json, "r") as f:
         feat_meta = json.load(f)
@@ -375,7 +658,13 @@ def main():
         raise ValueError(f"feature_key '{args.feature_key}' not found in {args.feature_json}")
     # original registry from JSON
     raw_features = feat_meta[args.feature_key]
-    all_cols = set(df.columns)
+
+    # Header only: the column checks below decide which columns the real read parses
+    all_cols = set(pd.read_csv(args.csv, nrows=0).columns)
+    if args.date_col not in all_cols:
+        raise ValueError(f"Missing date column: {args.date_col}")
+    if args.label_col not in all_cols:
+        raise ValueError(f"Missing label column: {args.label_col}")
 
     # minimal columns we truly require
     required = {"is_home", "rest_days", "b2b_flag"}
@@ -397,38 +686,65 @@ def main():
     features = used_features
     feature_hash = sha256_str(json.dumps(features, sort_keys=True))
 
+    # Load data: only the date, label and feature columns, and with --train-days only the rows
+    # inside TRAIN_CORE | CAL | HOLDOUT
+    usecols = list(dict.fromkeys([args.date_col, args.label_col, *features]))
+    lookback = None
+    if args.train_days is not None:
+        lookback = pd.Timedelta(days=args.train_days + args.calibration_days + args.holdout_days)
+    df = read_training_csv(args.csv, usecols, args.date_col, lookback)
+    obj = df.select_dtypes("object").columns
+    # pyarrow leaves missing strings as None; categorical levels are keyed on "nan"
+    df[obj] = df[obj].where(df[obj].notna(), np.nan)
+    df[args.date_col] = pd.to_datetime(df[args.date_col])
+
     eval_lines = [float(x) for x in args.eval_lines.split(",") if x.strip()]
     alpha_grid_poisson = [float(x) for x in args.alpha_grid_poisson.split(",") if x.strip()]
     alpha_grid_nb = [float(x) for x in args.alpha_grid_nb.split(",") if x.strip()]
 
-    # Temporal windows: TRAIN_CORE | CAL | HOLDOUT
-    max_date = df[args.date_col].max()
+    # Temporal windows: TRAIN_CORE | CAL | HOLDOUT. Sort by date once; each window is then a
+    # contiguous slice whose bounds come from searchsorted, and TRAIN_CORE is already in the
+    # row order make_temporal_folds expects.
+    dates = df[args.date_col].to_numpy("datetime64[ns]")
+    order = np.argsort(dates, kind="stable")
+    sd = dates[order]
+    max_date = pd.Timestamp(sd[-1])
     holdout_start = max_date - pd.Timedelta(days=args.holdout_days)
     calib_start = holdout_start - pd.Timedelta(days=args.calibration_days)
+    i_cal = np.searchsorted(sd, calib_start.to_datetime64(), side="right")
+    i_hold = np.searchsorted(sd, holdout_start.to_datetime64(), side="right")
 
-    df_calib = df[(df[args.date_col] > calib_start) & (df[args.date_col] <= holdout_start)].copy()
-    df_holdout = df[df[args.date_col] > holdout_start].copy()
-    df_train_core = df[df[args.date_col] <= calib_start].copy()
+    df = df.iloc[order].reset_index(drop=True)
+    df_train_core, df_calib, df_holdout = df.iloc[:i_cal], df.iloc[i_cal:i_hold], df.iloc[i_hold:]
     if df_train_core.empty:
         raise ValueError("No data in TRAIN_CORE after applying calibration window. Reduce --calibration-days or --holdout-days.")
 
+    # Feature schema fitted on TRAIN_CORE; its matrix is shared by CV and the winner fit
+    prep = FeaturePrep().fit(df_train_core, features)
+    # [1 | X]: the NB fits use it as is, sklearn's Poisson takes the X columns
+    Xc_core = prep.transform(df_train_core, args.dtype, add_const=True)
+    y_core = df_train_core[args.label_col].astype(int).values
+
     # CV selection
     best, diagnostics = run_cv_and_select(
         df_train_core=df_train_core,
         date_col=args.date_col,
         label_col=args.label_col,
-        features=features,
+        Xc_all=Xc_core,
         eval_lines=eval_lines,
         n_folds=args.n_folds,
         alpha_grid_poisson=alpha_grid_poisson,
         alpha_grid_nb=alpha_grid_nb,
+        n_jobs=args.n_jobs,
+        halving=not args.full_grid,
+        cache_dir=CV_CACHE_DIR if args.cv_cache else None,
     )
     print("📊 CV Diagnostics:")
     print(json.dumps(diagnostics, indent=2))
     print(f"🏆 Winner: {best.family} with params={best.params} | mean_brier={best.mean_brier:.6f}")
 
     # Fit winner on TRAIN_CORE
-    fam, model_obj, subartifact = fit_winner(best.family, best.params, df_train_core, features, args.label_col)
+    fam, model_obj, subartifact = fit_winner(best.family, best.params, Xc_core, prep.columns, y_core)
 
     # Per-line isotonic on CAL (guarded by balance + improvement)
     calibration_payload = fit_isotonic_per_line(
@@ -436,11 +752,12 @@ def main():
         family=fam,
         params=best.params,
         df_cal=df_calib,
-        features=features,
+        prep=prep,
         label_col=args.label_col,
         eval_lines=eval_lines,
         min_per_class=10,        # tolerant but safe
-        improve_tol=0.005
+        improve_tol=0.005,
+        dtype=args.dtype,
     ) if not df_calib.empty else {}
     if calibration_payload:
         print(f"✅ Fitted isotonic calibrators for lines: {list(calibration_payload.keys())}")
@@ -450,9 +767,12 @@ def main():
     # Holdout eval (raw + calibrated if present)
     metrics_holdout_raw, metrics_holdout_cal = {}, {}
     if not df_holdout.empty:
-        Xh = prepare_features(df_holdout, features)
+        Xh = prep.transform(df_holdout, args.dtype, add_const=True)
         yh = df_holdout[args.label_col].astype(int).values
-        raw_map = {L: predict_family(model_obj, fam, Xh, best.params.get("disp_alpha"), L) for L in eval_lines}
+        # one mu for the window; only the tail differs per line
+        mu_h = predict_mu(model_obj, fam, Xh)
+        P_raw = tail_probs(mu_h, fam, eval_lines, best.params.get("disp_alpha"))
+        raw_map = {L: P_raw[:, i] for i, L in enumerate(eval_lines)}
         metrics_holdout_raw = eval_lines_metrics(yh, raw_map)
         if calibration_payload:
             cal_map = {}
@@ -460,9 +780,9 @@ def main():
                 key = str(L)
                 cal = calibration_payload.get(key)
                 if cal:
-                    gx = np.array(cal["grid_x"], dtype=float)
-                    gy = np.array(cal["grid_y"], dtype=float)
-                    cal_map[L] = np.clip(np.interp(raw_map[L], gx, gy), 1e-6, 1-1e-6)
+                    x_th = np.array(cal["x_thresholds"], dtype=float)
+                    y_th = np.array(cal["y_thresholds"], dtype=float)
+                    cal_map[L] = np.clip(np.interp(raw_map[L], x_th, y_th), 1e-6, 1-1e-6)
             if cal_map:
                 metrics_holdout_cal = eval_lines_metrics(yh, cal_map)
 
@@ -478,6 +798,7 @@ def main():
         metrics_holdout_cal=metrics_holdout_cal,
         model_subartifact=subartifact,
         calibration_payload=calibration_payload,
+        column_kinds=prep.kinds,
     )
 
     print("✅ Completed. Model index and artifacts written.")
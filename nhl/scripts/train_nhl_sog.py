@@ -33,6 +33,8 @@ from sklearn.metrics import log_loss, roc_auc_score
 from scipy.stats import nbinom, poisson
 import statsmodels.api as sm
 
+from nhl_features import is_boolish_strings, boolish_to_float
+
 
 
 warnings.filterwarnings("ignore", category=FutureWarning)
@@ -110,28 +112,26 @@ def winsorize_numeric(s: pd.Series, p_low: float = 0.01, p_high: float = 0.99) -
     except Exception:
         return s
 
+def column_kind(col: pd.Series) -> str:
+    """Which prepare_features branch a raw column takes: binary, continuous or categorical."""
+    if is_bool_or_binary(col) or is_boolish_strings(col):
+        return "binary"
+    if ptypes.is_numeric_dtype(col):
+        return "continuous"
+    return "categorical"
+
 def prepare_features(df: pd.DataFrame, feature_list: List[str], schema: Optional[List[str]] = None) -> pd.DataFrame:
     """Cast numerics, coerce boolean-like strings to 0/1, one-hot categoricals; if schema
     is provided, reindex to that column set (fill missing with 0.0) for stability."""
     X = df[feature_list].copy()
 
-    # helper: detect boolean-like strings
-    def _is_boolish_strings(series: pd.Series) -> bool:
-        vals = series.dropna().astype(str).str.strip().str.lower().unique()
-        if len(vals) == 0:
-            return False
-        allowed = {"t","f","true","false","y","n","yes","no","1","0"}
-        return set(vals).issubset(allowed)
-
     for c in X.columns:
         col = X[c]
-        if is_bool_or_binary(col) or _is_boolish_strings(col):
-            # map common string booleans to 0/1 then to float
-            s = col.astype(str).str.strip().str.lower()
-            mapped = s.replace({"t":1,"true":1,"y":1,"yes":1,"1":1,
-                                "f":0,"false":0,"n":0,"no":0,"0":0})
-            X[c] = pd.to_numeric(mapped, errors="coerce").fillna(0).astype(float)
-        elif ptypes.is_numeric_dtype(col):
+        kind = column_kind(col)
+        if kind == "binary":
+            # map common string booleans to 0/1 then to float (same mapping the scorer uses)
+            X[c] = np.nan_to_num(boolish_to_float(col), nan=0.0)
+        elif kind == "continuous":
             X[c] = pd.to_numeric(col, errors="coerce").astype(float)
             X[c] = winsorize_numeric(X[c]).fillna(X[c].median())
         else:
@@ -383,6 +383,7 @@ def save_artifacts(
     metrics_holdout_cal: Optional[Dict[str, Dict]],
     model_subartifact: Dict,
     calibration_payload: Optional[Dict],
+    column_kinds: Optional[Dict[str, str]] = None,
 ):
     os.makedirs(out_dir, exist_ok=True)
     model_artifact = {
@@ -391,6 +392,7 @@ def save_artifacts(
         "feature_key": feature_key,
         "eval_lines": eval_lines,
         "calibration": calibration_payload or {},  # per-line grids if present
+        "column_kinds": column_kinds or {},  # raw feature -> binary/continuous/categorical
     }
     model_artifact.update({"sklearn_poisson": model_subartifact} if best.family=="poisson" else {"statsmodels_nb": model_subartifact})
 
@@ -548,6 +550,7 @@ def main():
         metrics_holdout_cal=metrics_holdout_cal,
         model_subartifact=subartifact,
         calibration_payload=calibration_payload,
+        column_kinds={c: column_kind(df_train_core[c]) for c in features},
     )
 
     # Save feature hash file (for scorers to sanity-check)